@@ -24,6 +24,10 @@ from app.models.mailing_transaction import MailingTransaction
 from app.models.queued_letter import QueuedLetter
 from app.models.bill_politician import BillPolitician
 from app.models.global_return_address import GlobalReturnAddress
+from app.models.lob_event import LobEvent
+from app.models.email_outbox import EmailOutbox
+from app.models.user_photo import UserPhoto
+from app.models.stripe_event import StripeEvent
 
 
 config = context.config
@@ -0,0 +1,28 @@
+"""Add otp code indexes
+
+Revision ID: 2d7c4f9a1b63
+Revises: e4a8d0b6c2f1
+Create Date: 2026-10-19 12:41:05.118270+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7c4f9a1b63'
+down_revision: Union[str, None] = 'e4a8d0b6c2f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_otp_codes_user_id_purpose_code', 'otp_codes', ['user_id', 'purpose', 'code'], unique=False, postgresql_include=['expires_at'])
+    op.create_index('ix_otp_codes_expires_at', 'otp_codes', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_otp_codes_expires_at', table_name='otp_codes')
+    op.drop_index('ix_otp_codes_user_id_purpose_code', table_name='otp_codes')
@@ -0,0 +1,36 @@
+"""Add stripe events
+
+Revision ID: 3f8a1c6e9d27
+Revises: 7e2b5d8f4a19
+Create Date: 2026-10-19 14:21:48.913025+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a1c6e9d27'
+down_revision: Union[str, None] = '7e2b5d8f4a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stripe_events',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('applied_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stripe_events_unapplied', 'stripe_events', ['received_at'], unique=False, postgresql_where=sa.text('applied_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stripe_events_unapplied', table_name='stripe_events', postgresql_where=sa.text('applied_at IS NULL'))
+    op.drop_table('stripe_events')
@@ -0,0 +1,26 @@
+"""Add idempotency key to mailing transactions
+
+Revision ID: 5c1e9a7d3f20
+Revises: af2c67ec83b1
+Create Date: 2026-10-19 09:12:41.530118+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d3f20'
+down_revision: Union[str, None] = 'af2c67ec83b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('mailing_transactions', sa.Column('idempotency_key', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('mailing_transactions', 'idempotency_key')
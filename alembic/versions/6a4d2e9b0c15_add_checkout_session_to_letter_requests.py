@@ -0,0 +1,30 @@
+"""Add checkout session to user letter requests
+
+Revision ID: 6a4d2e9b0c15
+Revises: 3f8a1c6e9d27
+Create Date: 2026-10-19 14:58:02.417736+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a4d2e9b0c15'
+down_revision: Union[str, None] = '3f8a1c6e9d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_letter_requests', sa.Column('checkout_session_id', sa.String(), nullable=True))
+    op.add_column('user_letter_requests', sa.Column('checkout_session_url', sa.String(), nullable=True))
+    op.add_column('user_letter_requests', sa.Column('checkout_session_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('user_letter_requests', 'checkout_session_expires_at')
+    op.drop_column('user_letter_requests', 'checkout_session_url')
+    op.drop_column('user_letter_requests', 'checkout_session_id')
@@ -0,0 +1,69 @@
+"""Move profile photos to user_photos
+
+Revision ID: 7e2b5d8f4a19
+Revises: 2d7c4f9a1b63
+Create Date: 2026-10-19 14:08:33.652907+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b5d8f4a19'
+down_revision: Union[str, None] = '2d7c4f9a1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_photos',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('etag', sa.String(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'kind')
+    )
+    op.add_column('users', sa.Column('photo_etag', sa.String(), nullable=True))
+
+    # Existing photos were stored as PNG
+    op.execute("""
+        INSERT INTO user_photos (user_id, kind, content_type, etag, data)
+        SELECT id, 'photo', 'image/png', encode(sha256(profile_photo), 'hex'), profile_photo
+        FROM users WHERE profile_photo IS NOT NULL
+    """)
+    op.execute("""
+        INSERT INTO user_photos (user_id, kind, content_type, etag, data)
+        SELECT id, 'thumbnail', 'image/png', encode(sha256(thumbnail_photo), 'hex'), thumbnail_photo
+        FROM users WHERE thumbnail_photo IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE users SET photo_etag = user_photos.etag
+        FROM user_photos
+        WHERE user_photos.user_id = users.id AND user_photos.kind = 'photo'
+    """)
+
+    op.drop_column('users', 'thumbnail_photo')
+    op.drop_column('users', 'profile_photo')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('profile_photo', sa.LargeBinary(), nullable=True))
+    op.add_column('users', sa.Column('thumbnail_photo', sa.LargeBinary(), nullable=True))
+    op.execute("""
+        UPDATE users SET profile_photo = user_photos.data
+        FROM user_photos
+        WHERE user_photos.user_id = users.id AND user_photos.kind = 'photo'
+    """)
+    op.execute("""
+        UPDATE users SET thumbnail_photo = user_photos.data
+        FROM user_photos
+        WHERE user_photos.user_id = users.id AND user_photos.kind = 'thumbnail'
+    """)
+    op.drop_column('users', 'photo_etag')
+    op.drop_table('user_photos')
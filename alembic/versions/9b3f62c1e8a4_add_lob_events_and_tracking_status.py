@@ -0,0 +1,43 @@
+"""Add lob events and mailing tracking status
+
+Revision ID: 9b3f62c1e8a4
+Revises: 5c1e9a7d3f20
+Create Date: 2026-10-19 10:03:17.284561+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3f62c1e8a4'
+down_revision: Union[str, None] = '5c1e9a7d3f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('lob_events',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('resource_id', sa.String(), nullable=True),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('applied_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_lob_events_unapplied', 'lob_events', ['received_at'], unique=False, postgresql_where=sa.text('applied_at IS NULL'))
+    op.add_column('mailing_transactions', sa.Column('tracking_status', sa.String(), nullable=True))
+    op.add_column('mailing_transactions', sa.Column('tracking_updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_mailing_transactions_external_mail_service_id'), 'mailing_transactions', ['external_mail_service_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_mailing_transactions_external_mail_service_id'), table_name='mailing_transactions')
+    op.drop_column('mailing_transactions', 'tracking_updated_at')
+    op.drop_column('mailing_transactions', 'tracking_status')
+    op.drop_index('ix_lob_events_unapplied', table_name='lob_events', postgresql_where=sa.text('applied_at IS NULL'))
+    op.drop_table('lob_events')
@@ -0,0 +1,36 @@
+"""Add Lob event retries
+
+Revision ID: a5d39c8e7f14
+Revises: f2b86d4e1c07
+Create Date: 2026-10-19 18:54:09.384716+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d39c8e7f14'
+down_revision: Union[str, None] = 'f2b86d4e1c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('lob_events', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('lob_events', sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('lob_events', sa.Column('dead_lettered_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('lob_events', sa.Column('last_error', sa.String(), nullable=True))
+    op.drop_index('ix_lob_events_unapplied', table_name='lob_events', postgresql_where=sa.text('applied_at IS NULL'))
+    op.create_index('ix_lob_events_unapplied', 'lob_events', ['received_at'], unique=False, postgresql_where=sa.text('applied_at IS NULL AND dead_lettered_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_lob_events_unapplied', table_name='lob_events', postgresql_where=sa.text('applied_at IS NULL AND dead_lettered_at IS NULL'))
+    op.create_index('ix_lob_events_unapplied', 'lob_events', ['received_at'], unique=False, postgresql_where=sa.text('applied_at IS NULL'))
+    op.drop_column('lob_events', 'last_error')
+    op.drop_column('lob_events', 'dead_lettered_at')
+    op.drop_column('lob_events', 'next_attempt_at')
+    op.drop_column('lob_events', 'attempts')
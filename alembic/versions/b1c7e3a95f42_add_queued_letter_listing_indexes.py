@@ -0,0 +1,32 @@
+"""Add queued letter listing indexes
+
+Revision ID: b1c7e3a95f42
+Revises: 6a4d2e9b0c15
+Create Date: 2026-10-19 15:40:26.081374+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1c7e3a95f42'
+down_revision: Union[str, None] = '6a4d2e9b0c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_queued_letters_created_at_id', 'queued_letters', ['created_at', 'id'], unique=False)
+    op.create_index('ix_queued_letters_status_created_at_id', 'queued_letters', ['status', 'created_at', 'id'], unique=False)
+    op.create_index(op.f('ix_user_letter_requests_bill_id'), 'user_letter_requests', ['bill_id'], unique=False)
+    op.create_index(op.f('ix_user_letter_requests_politician_id'), 'user_letter_requests', ['politician_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_letter_requests_politician_id'), table_name='user_letter_requests')
+    op.drop_index(op.f('ix_user_letter_requests_bill_id'), table_name='user_letter_requests')
+    op.drop_index('ix_queued_letters_status_created_at_id', table_name='queued_letters')
+    op.drop_index('ix_queued_letters_created_at_id', table_name='queued_letters')
@@ -0,0 +1,40 @@
+"""Include id in otp code lookup index
+
+Revision ID: b8e17a4c2d90
+Revises: a5d39c8e7f14
+Create Date: 2026-10-19 19:12:47.530961+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e17a4c2d90'
+down_revision: Union[str, None] = 'a5d39c8e7f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = 'ix_otp_codes_user_id_purpose_code'
+COLUMNS = ['user_id', 'purpose', 'code']
+
+
+def _rebuild(include) -> None:
+    # Build the replacement before dropping the old index so lookups never lose it. A failed
+    # CREATE INDEX CONCURRENTLY leaves an INVALID _new index behind, so never reuse one.
+    with op.get_context().autocommit_block():
+        op.drop_index(f'{INDEX}_new', table_name='otp_codes', postgresql_concurrently=True, if_exists=True)
+        op.create_index(f'{INDEX}_new', 'otp_codes', COLUMNS, unique=False, postgresql_include=include,
+                        postgresql_concurrently=True)
+        # One query string runs as one implicit transaction, so the swap can't stop halfway. The plain
+        # DROP INDEX only holds its exclusive lock on otp_codes for that instant.
+        op.execute(f'DROP INDEX IF EXISTS {INDEX}; ALTER INDEX {INDEX}_new RENAME TO {INDEX}')
+
+
+def upgrade() -> None:
+    _rebuild(['expires_at', 'id'])
+
+
+def downgrade() -> None:
+    _rebuild(['expires_at'])
@@ -0,0 +1,28 @@
+"""Add unconfirmed mailing status
+
+Revision ID: c4f2a9e6b815
+Revises: b8e17a4c2d90
+Create Date: 2026-10-19 19:48:22.671304+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f2a9e6b815'
+down_revision: Union[str, None] = 'b8e17a4c2d90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ALTER TYPE ... ADD VALUE can't run inside a transaction block before PostgreSQL 12
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE mailingstatus ADD VALUE IF NOT EXISTS 'unconfirmed'")
+
+
+def downgrade() -> None:
+    # PostgreSQL can't drop an enum value; park the rows as failed and leave the value unused
+    op.execute("UPDATE mailing_transactions SET status = 'failed' WHERE status = 'unconfirmed'")
@@ -0,0 +1,35 @@
+"""Add priority and schedule to queued letters
+
+Revision ID: c8e2f05a7d31
+Revises: b1c7e3a95f42
+Create Date: 2026-10-19 16:12:55.730158+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e2f05a7d31'
+down_revision: Union[str, None] = 'b1c7e3a95f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('queued_letters', sa.Column('priority', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('queued_letters', sa.Column('scheduled_for', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.add_column('queued_letters', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+    # Existing letters keep their place in the queue
+    op.execute("UPDATE queued_letters SET scheduled_for = created_at WHERE created_at IS NOT NULL")
+    op.alter_column('queued_letters', 'scheduled_for', nullable=False)
+    op.create_index('ix_queued_letters_claimable', 'queued_letters', [sa.text('priority DESC'), 'scheduled_for', 'id'], unique=False, postgresql_where=sa.text("status = 'queued'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_queued_letters_claimable', table_name='queued_letters', postgresql_where=sa.text("status = 'queued'"))
+    op.drop_column('queued_letters', 'claimed_at')
+    op.drop_column('queued_letters', 'scheduled_for')
+    op.drop_column('queued_letters', 'priority')
@@ -0,0 +1,40 @@
+"""Add letter lifecycle indexes
+
+Revision ID: d3a9f17c5e60
+Revises: c8e2f05a7d31
+Create Date: 2026-10-19 17:04:31.208114+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a9f17c5e60'
+down_revision: Union[str, None] = 'c8e2f05a7d31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_user_letter_requests_user_id', 'user_letter_requests', ['user_id']),
+    ('ix_user_letter_requests_status_paid_at', 'user_letter_requests', ['status', 'paid_at']),
+    ('ix_mailing_transactions_user_letter_request_id', 'mailing_transactions', ['user_letter_request_id']),
+    ('ix_queued_letters_user_letter_request_id', 'queued_letters', ['user_letter_request_id']),
+    ('ix_bill_politicians_politician_id', 'bill_politicians', ['politician_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY doesn't block writes but can't run inside a transaction.
+    # If a build fails it leaves an invalid index behind; drop it and run the upgrade again.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,26 @@
+"""Add retried_at to mailing transactions
+
+Revision ID: e7c41b2d9a58
+Revises: d3a9f17c5e60
+Create Date: 2026-10-19 18:02:14.551902+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c41b2d9a58'
+down_revision: Union[str, None] = 'd3a9f17c5e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('mailing_transactions', sa.Column('retried_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('mailing_transactions', 'retried_at')
@@ -0,0 +1,28 @@
+"""Add unconfirmed email status
+
+Revision ID: f2b86d4e1c07
+Revises: e7c41b2d9a58
+Create Date: 2026-10-19 18:31:47.120385+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b86d4e1c07'
+down_revision: Union[str, None] = 'e7c41b2d9a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ALTER TYPE ... ADD VALUE can't run inside a transaction block before PostgreSQL 12
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE emailstatus ADD VALUE IF NOT EXISTS 'unconfirmed'")
+
+
+def downgrade() -> None:
+    # PostgreSQL can't drop an enum value; park the rows as failed and leave the value unused
+    op.execute("UPDATE email_outbox SET status = 'failed' WHERE status = 'unconfirmed'")
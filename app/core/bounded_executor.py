@@ -0,0 +1,56 @@
+# app/core/bounded_executor.py
+
+import threading
+import time
+from app.core.metrics import registry
+
+class ExecutorBusy(Exception):
+    """
+    Raised when a BoundedExecutor already has max_pending jobs running or queued.
+    The app turns this into 429 Too Many Requests.
+    """
+
+class BoundedExecutor:
+    """
+    Runs CPU-heavy work off the request threads with admission control: at most max_pending
+    jobs may be running or queued, and callers beyond that are rejected instead of piling up.
+    Reports <name>_pending and <name>_capacity gauges and a <name>_latency_seconds histogram.
+    """
+    def __init__(self, name: str, executor_factory, max_pending: int, inline: bool = False):
+        self._executor_factory = executor_factory
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._inline = inline
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._latency = registry.histogram(f"{name}_latency_seconds")
+
+        registry.register_gauge(f"{name}_pending", lambda: self._pending)
+        registry.register_gauge(f"{name}_capacity", lambda: max_pending)
+
+    def _get_executor(self):
+        # Created on first use so importing the module stays cheap
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = self._executor_factory()
+        return self._executor
+
+    def _adjust_pending(self, delta: int):
+        with self._pending_lock:
+            self._pending += delta
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorBusy()
+        self._adjust_pending(1)
+        start = time.perf_counter()
+        try:
+            if self._inline:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._latency.observe(time.perf_counter() - start)
+            self._adjust_pending(-1)
+            self._slots.release()
@@ -8,6 +8,20 @@ ENV_FILE = BASE_DIR.parent / ".env"
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # asyncpg URL for the async routes; derived from DATABASE_URL when empty
+    ASYNC_DATABASE_URL: str = ""
+    # Connection pool, applied to the sync and async engines separately
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Behind PgBouncer (transaction pooling): no app-side pool and no prepared statements
+    DB_PGBOUNCER: bool = False
+    # Read replicas (comma-separated, same form as DATABASE_URL) for endpoints that opt in; empty reads from the primary
+    REPLICA_DATABASE_URLS: str = ""
+    # After a user's own write, their replica reads go to the primary for this long
+    REPLICA_STICKY_SECONDS: int = 10
     STRIPE_SECRET_KEY: str
     STRIPE_ENDPOINT_SECRET: str
     LOB_API_KEY: str
@@ -20,6 +34,81 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     MAILGUN_API_KEY: str
     MAILGUN_DOMAIN: str
+    MAILGUN_BASE_URL: str = "https://api.mailgun.net/v3"
+
+    # Email outbox; EMAIL_TRANSPORT is "mailgun" or "stub" (logs instead of sending)
+    EMAIL_TRANSPORT: str = "mailgun"
+    EMAIL_FROM_ADDRESS: str = "letterlobby@serviceorchard.com"
+    EMAIL_BATCH_SIZE: int = 100
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_SENDER_POLL_SECONDS: float = 1.0
+    # Claimed emails are skipped by other senders this long; a crashed sender's unsent emails are picked up after it
+    EMAIL_SEND_LEASE_SECONDS: int = 300
+
+    # Short-lived state; KV_BACKEND is "memory" (single process only) or "redis"
+    KV_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # Where OTP codes live: "database" (otp_codes table) or "kv" (the key-value store above)
+    OTP_STORAGE: str = "database"
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    # Processes serving the app; uvicorn and gunicorn also read WEB_CONCURRENCY as their worker count.
+    # With more than one, principals are only cached in a shared KV backend.
+    WEB_CONCURRENCY: int = 1
+
+    # Password hashing; PASSWORD_HASH_WORKERS=0 hashes inline on the request thread
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+
+    # Profile photo uploads; PROFILE_PHOTO_FORMAT is "WEBP" or "JPEG"
+    PROFILE_PHOTO_MAX_BYTES: int = 10 * 1024 * 1024
+    PROFILE_PHOTO_MAX_PIXELS: int = 50_000_000
+    PROFILE_PHOTO_FORMAT: str = "WEBP"
+    PROFILE_PHOTO_QUALITY: int = 85
+    PROFILE_PHOTO_WORKERS: int = 2
+    PROFILE_PHOTO_MAX_PENDING: int = 8
+    OTP_PURGE_INTERVAL_SECONDS: int = 3600
+    OTP_PURGE_BATCH_SIZE: int = 1000
+
+    # Shared outbound HTTP client
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_READ_TIMEOUT_SECONDS: float = 30.0
+    HTTP_POOL_CONNECTIONS: int = 10
+    HTTP_POOL_MAXSIZE: int = 20
+
+    # Lob direct mail API and the background mailing dispatcher
+    LOB_BASE_URL: str = "https://api.lob.com/v1"
+    LOB_RATE_LIMIT_PER_SECOND: float = 25.0
+    MAILING_DISPATCHER_ENABLED: bool = False
+    MAILING_DISPATCHER_CONCURRENCY: int = 4
+    MAILING_DISPATCHER_POLL_SECONDS: float = 5.0
+    MAILING_MAX_ATTEMPTS: int = 5
+    MAILING_PENDING_STALE_SECONDS: int = 600
+
+    # Lob tracking webhooks
+    LOB_WEBHOOK_SECRET: str = ""
+    LOB_WEBHOOK_TOLERANCE_SECONDS: int = 300
+    LOB_EVENT_BATCH_SIZE: int = 500
+    LOB_EVENT_POLL_SECONDS: float = 2.0
+    # Events for a letter that isn't known yet are retried with backoff this many times, then dead-lettered
+    LOB_EVENT_MAX_ATTEMPTS: int = 10
+
+    # Print queue claims are released if the batch isn't marked processed within the lease
+    PRINT_QUEUE_CLAIM_LEASE_SECONDS: int = 900
+
+    # Stripe; STRIPE_API_BASE points the client at a local stand-in (python -m app.devtools.fake_stripe)
+    STRIPE_API_BASE: str = ""
+    # Stored checkout sessions are reused until this close to their expiry
+    STRIPE_CHECKOUT_REUSE_MARGIN_SECONDS: int = 300
+
+    # Stripe webhook events applier
+    STRIPE_EVENT_BATCH_SIZE: int = 500
+    STRIPE_EVENT_POLL_SECONDS: float = 2.0
+
+    # Nightly payment reconciliation against Stripe checkout sessions
+    PAYMENT_RECONCILE_INTERVAL_SECONDS: int = 86400
+    PAYMENT_RECONCILE_LOOKBACK_SECONDS: int = 3 * 86400
+    PAYMENT_RECONCILE_BATCH_SIZE: int = 1000
 
     model_config = SettingsConfigDict(env_file=str(ENV_FILE))
 
@@ -1,13 +1,56 @@
 # app/core/database.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_pool import engine_options, instrument_pool
+from app.core.db_routing import RoutingSession
 
-engine = create_engine(settings.DATABASE_URL, future=True)
+engine = create_engine(settings.DATABASE_URL, future=True, **engine_options("sync"))
+instrument_pool(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
+def _asyncpg_url(url: str) -> str:
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+def async_database_url() -> str:
+    """
+    ASYNC_DATABASE_URL if set, otherwise DATABASE_URL with its driver swapped for asyncpg.
+    """
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return _asyncpg_url(settings.DATABASE_URL)
+
+def replica_database_urls() -> list:
+    return [url.strip() for url in settings.REPLICA_DATABASE_URLS.split(",") if url.strip()]
+
+# Used by the async routes; objects stay usable after commit since they are serialized afterwards
+async_engine = create_async_engine(async_database_url(), **engine_options("async", is_async=True))
+instrument_pool(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Read replicas, used only by endpoints that opt in through get_read_db / get_async_read_db.
+# Each replica gets a sync and an async engine, pooled like the primary's.
+replica_engines = []
+async_replica_engines = []
+for i, url in enumerate(replica_database_urls()):
+    replica_engines.append(create_engine(url, future=True, **engine_options(f"replica{i}")))
+    instrument_pool(replica_engines[-1], f"replica{i}")
+    async_replica_engines.append(create_async_engine(_asyncpg_url(url), **engine_options(f"async_replica{i}", is_async=True)))
+    instrument_pool(async_replica_engines[-1].sync_engine, f"async_replica{i}")
+
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, future=True,
+    primary=engine, replicas=replica_engines
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+    primary=async_engine.sync_engine, replicas=[e.sync_engine for e in async_replica_engines]
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -16,3 +59,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
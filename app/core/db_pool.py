@@ -0,0 +1,76 @@
+# app/core/db_pool.py
+
+import threading
+import time
+import uuid
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from app.core.config import settings
+from app.core.metrics import registry
+
+class _CheckedOutCounter:
+    # Counted from pool events so it also works for NullPool, which keeps no bookkeeping
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, delta: int):
+        with self._lock:
+            self.value += delta
+
+def _timed_pool_class(base, name: str):
+    """
+    Subclass of the pool class that records how long each connection checkout took, including
+    time spent queued behind other checkouts and opening new connections.
+    """
+    wait_time = registry.histogram(f"db_pool_wait_seconds:{name}")
+
+    class TimedPool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            finally:
+                wait_time.observe(time.perf_counter() - start)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+def engine_options(name: str, is_async: bool = False) -> dict:
+    """
+    create_engine / create_async_engine keyword arguments for the pool settings.
+    With DB_PGBOUNCER the app keeps no connections of its own (PgBouncer pools them) and
+    asyncpg doesn't use prepared statements, which transaction pooling can't support.
+    """
+    if settings.DB_PGBOUNCER:
+        options = {"poolclass": _timed_pool_class(NullPool, name)}
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__"
+            }
+        return options
+
+    return {
+        "poolclass": _timed_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, name),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+
+def instrument_pool(engine, name: str):
+    """
+    Report db_pool_checked_out, db_pool_overflow and db_pool_size gauges for engine (a sync
+    Engine; pass async_engine.sync_engine for async engines). The pool is looked up on every
+    snapshot since dispose() replaces it.
+    """
+    checked_out = _CheckedOutCounter()
+    event.listen(engine, "checkout", lambda *args: checked_out.add(1))
+    event.listen(engine, "checkin", lambda *args: checked_out.add(-1))
+
+    registry.register_gauge(f"db_pool_checked_out:{name}", lambda: checked_out.value)
+    registry.register_gauge(f"db_pool_overflow:{name}", lambda: max(getattr(engine.pool, "overflow", lambda: 0)(), 0))
+    registry.register_gauge(f"db_pool_size:{name}", lambda: getattr(engine.pool, "size", lambda: 0)())
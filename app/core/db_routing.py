@@ -0,0 +1,66 @@
+# app/core/db_routing.py
+
+import random
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.kv_store import get_kv_store, run_store_call
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def _sticky_key(user_id: str) -> str:
+    return f"primary_reads:{user_id}"
+
+def pin_reads_to_primary(user_id: str):
+    """
+    Send user_id's replica reads to the primary for REPLICA_STICKY_SECONDS, so they see their
+    own write while the replicas catch up.
+    """
+    get_kv_store().set(_sticky_key(user_id), "1", settings.REPLICA_STICKY_SECONDS)
+
+def reads_pinned_to_primary(user_id: str) -> bool:
+    return get_kv_store().get(_sticky_key(user_id)) is not None
+
+class RoutingSession(Session):
+    """
+    Session for read-only endpoints. Plain SELECTs go to one replica, picked when the session is
+    created; flushes, DML and SELECT ... FOR UPDATE go to the primary, and once the session has
+    written, its reads stay on the primary as well. With use_primary or no replicas everything
+    goes to the primary.
+    """
+    def __init__(self, *args, primary=None, replicas=(), use_primary: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._primary = primary
+        self._replica = random.choice(replicas) if replicas and not use_primary else None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._replica is not None:
+            if isinstance(clause, Select) and clause._for_update_arg is None and not self._flushing:
+                return self._replica
+            if self._flushing or clause is not None:
+                self._replica = None
+        return self._primary
+
+class ReadYourWritesMiddleware:
+    """
+    Pins the caller's replica reads to the primary once a mutating request (anything but GET,
+    HEAD and OPTIONS) by an authenticated user succeeds. The user id is the one get_current_user
+    stores on request.state. The pin is set before the response goes out, so the client's next
+    read already sees it.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not settings.REPLICA_DATABASE_URLS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_pinning(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                user_id = scope.get("state", {}).get("user_id")
+                if user_id is not None:
+                    await run_store_call(pin_reads_to_primary, user_id)
+            await send(message)
+
+        await self.app(scope, receive, send_pinning)
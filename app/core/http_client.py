@@ -0,0 +1,90 @@
+# app/core/http_client.py
+
+import time
+from dataclasses import dataclass
+import requests
+from requests.adapters import HTTPAdapter
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.throttling import backoff_delay
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How many times to attempt a call and which failures are worth retrying.
+    Read timeouts are only safe to retry when the remote side deduplicates the request.
+    """
+    max_attempts: int = 1
+    backoff_base: float = 0.5
+    backoff_cap: float = 30.0
+    retry_statuses: frozenset = frozenset({429, 500, 502, 503, 504})
+    retry_read_timeouts: bool = True
+
+    def should_retry(self, exc: Exception) -> bool:
+        if isinstance(exc, requests.ReadTimeout):
+            return self.retry_read_timeouts
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            return exc.response.status_code in self.retry_statuses
+        return False
+
+NO_RETRY = RetryPolicy()
+
+class HTTPClient:
+    """
+    Shared outbound HTTP client. One keep-alive connection pool per host is reused across calls,
+    every call has connect and read timeouts, and latency is recorded per service in the metrics registry.
+    """
+    def __init__(self, pool_connections: int, pool_maxsize: int, connect_timeout: float, read_timeout: float):
+        self.timeout = (connect_timeout, read_timeout)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        service: str,
+        retry: RetryPolicy = NO_RETRY,
+        rate_limiter=None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Perform a request, raising requests.HTTPError for error responses once retries are exhausted.
+        rate_limiter (a TokenBucket) is acquired before every attempt.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        latency = registry.histogram(f"http_client_latency_seconds:{service}")
+
+        attempt = 0
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self._session.request(method, url, **kwargs)
+                response.raise_for_status()
+                return response
+            except requests.RequestException as e:
+                attempt += 1
+                if attempt >= retry.max_attempts or not retry.should_retry(e):
+                    raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+            time.sleep(backoff_delay(attempt - 1, retry.backoff_base, retry.backoff_cap))
+
+    def get(self, url: str, service: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, service, **kwargs)
+
+    def post(self, url: str, service: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, service, **kwargs)
+
+http_client = HTTPClient(
+    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.HTTP_READ_TIMEOUT_SECONDS
+)
@@ -0,0 +1,141 @@
+# app/core/kv_store.py
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, TypeVar
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+
+T = TypeVar("T")
+
+class KVStore(ABC):
+    """
+    Minimal key-value store for short-lived string values with a per-key TTL in seconds.
+    shared is True when every process sees the same data.
+    """
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl_seconds: int):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove a key, returning True only if it existed; lets concurrent consumers race safely."""
+
+    @abstractmethod
+    def incr(self, key: str, ttl_seconds: int) -> int:
+        """Increment a counter, starting its TTL when it is created (fixed-window rate limits)."""
+
+class InMemoryKVStore(KVStore):
+    """
+    Process-local store. Only suitable when a single worker process serves the app.
+    """
+    def __init__(self, sweep_every: int = 1000):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._sweep_every = sweep_every
+        self._writes = 0
+
+    def _live(self, key: str, now: float):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def _maybe_sweep(self, now: float):
+        # Drop expired keys that are never read again
+        self._writes += 1
+        if self._writes % self._sweep_every == 0:
+            for key in [k for k, (_, expires_at) in self._data.items() if expires_at <= now]:
+                del self._data[key]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            return entry[0] if entry else None
+
+    def set(self, key: str, value: str, ttl_seconds: int):
+        with self._lock:
+            now = time.monotonic()
+            self._data[key] = (value, now + ttl_seconds)
+            self._maybe_sweep(now)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._live(key, time.monotonic()) is not None and self._data.pop(key, None) is not None
+
+    def incr(self, key: str, ttl_seconds: int) -> int:
+        with self._lock:
+            now = time.monotonic()
+            entry = self._live(key, now)
+            if entry is None:
+                value, expires_at = 1, now + ttl_seconds
+                self._maybe_sweep(now)
+            else:
+                value, expires_at = int(entry[0]) + 1, entry[1]
+            self._data[key] = (str(value), expires_at)
+            return value
+
+class RedisKVStore(KVStore):
+    """
+    Backend for anything speaking the Redis protocol (Redis, Valkey, KeyDB or a local stand-in).
+    """
+    shared = True
+
+    def __init__(self, url: str, key_prefix: str = "letterlobby:"):
+        import redis  # only needed when this backend is selected
+
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._prefix = key_prefix
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(self._prefix + key)
+
+    def set(self, key: str, value: str, ttl_seconds: int):
+        self._client.set(self._prefix + key, value, ex=ttl_seconds)
+
+    def delete(self, key: str) -> bool:
+        return self._client.delete(self._prefix + key) > 0
+
+    def incr(self, key: str, ttl_seconds: int) -> int:
+        pipe = self._client.pipeline()
+        pipe.set(self._prefix + key, 0, ex=ttl_seconds, nx=True)
+        pipe.incr(self._prefix + key)
+        _, value = pipe.execute()
+        return value
+
+_kv_store = None
+_kv_store_lock = threading.Lock()
+
+def get_kv_store() -> KVStore:
+    """
+    Shared store selected by KV_BACKEND ("memory" or "redis").
+    """
+    global _kv_store
+    if _kv_store is None:
+        with _kv_store_lock:
+            if _kv_store is None:
+                if settings.KV_BACKEND == "redis":
+                    _kv_store = RedisKVStore(settings.REDIS_URL)
+                else:
+                    _kv_store = InMemoryKVStore()
+    return _kv_store
+
+async def run_store_call(fn: Callable[..., T], *args) -> T:
+    """
+    Call fn, a function using the shared store, from async code. The in-memory store is only a
+    dictionary access and is called inline; network backends run in the threadpool so they don't
+    block the event loop.
+    """
+    if isinstance(get_kv_store(), InMemoryKVStore):
+        return fn(*args)
+    return await run_in_threadpool(fn, *args)
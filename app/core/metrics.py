@@ -0,0 +1,66 @@
+# app/core/metrics.py
+
+import bisect
+import threading
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """
+    Thread-safe histogram with fixed upper-bound buckets, reported cumulatively like Prometheus.
+    """
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {"count": count, "sum": total, "buckets": buckets}
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def register_gauge(self, name: str, callback):
+        """
+        Report the current value of callback() under name in every snapshot.
+        """
+        with self._lock:
+            self._gauges[name] = callback
+
+    def histogram(self, name: str, buckets=DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(buckets)
+            return self._histograms[name]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            histograms = dict(self._histograms)
+            gauges = dict(self._gauges)
+        return {
+            "gauges": {name: callback() for name, callback in sorted(gauges.items())},
+            "histograms": {name: h.snapshot() for name, h in sorted(histograms.items())}
+        }
+
+registry = MetricsRegistry()
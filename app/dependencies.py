@@ -1,14 +1,20 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, ReadSessionLocal, AsyncReadSessionLocal, replica_engines
+from app.core.db_routing import reads_pinned_to_primary
+from app.core.kv_store import run_store_call
 from app.models.user import User
 from app.services.jwt_service import decode_access_token
+from app.services.principal_cache import Principal, get_principal, get_principal_async
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     try:
         payload = decode_access_token(token)
         user_id = payload.get("sub")
@@ -16,24 +22,101 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user or not user.is_active:
+        principal = get_principal(db, user_id)
+        if not principal or not principal.is_active:
             raise HTTPException(status_code=401, detail="Invalid user")
 
-        if user.token_version != token_version:
+        if principal.token_version != token_version:
             raise HTTPException(status_code=401, detail="Token revoked")
 
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    return user
+    # Lets ReadYourWritesMiddleware pin this user's replica reads after a write
+    request.state.user_id = user_id
+    return principal
+
+async def get_current_user_async(request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """
+    get_current_user for async routes, so authentication doesn't take a threadpool slot.
+    """
+    try:
+        payload = decode_access_token(token)
+        user_id = payload.get("sub")
+        token_version = payload.get("token_version", 0)
+        if user_id is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        principal = await get_principal_async(db, user_id)
+        if not principal or not principal.is_active:
+            raise HTTPException(status_code=401, detail="Invalid user")
+
+        if principal.token_version != token_version:
+            raise HTTPException(status_code=401, detail="Token revoked")
+
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    # Lets ReadYourWritesMiddleware pin this user's replica reads after a write
+    request.state.user_id = user_id
+    return principal
+
+def _reads_pinned(request: Request) -> bool:
+    """
+    Whether the bearer token's user wrote recently enough that replica reads could miss it.
+    The token is only decoded here, not verified against the user; endpoints that need a
+    user still depend on get_current_user.
+    """
+    if not replica_engines:
+        return False
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user_id: Optional[str] = decode_access_token(token).get("sub")
+    except JWTError:
+        return False
+    return user_id is not None and reads_pinned_to_primary(user_id)
+
+def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: SELECTs go to a read replica, unless the caller made a
+    write in the last REPLICA_STICKY_SECONDS. Without replicas it behaves like get_db.
+    """
+    db = ReadSessionLocal(use_primary=_reads_pinned(request))
+    try:
+        yield db
+    finally:
+        db.close()
 
-def require_verified_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_async_read_db(request: Request):
+    """
+    get_read_db for async routes.
+    """
+    use_primary = bool(replica_engines) and await run_store_call(_reads_pinned, request)
+    async with AsyncReadSessionLocal(use_primary=use_primary) as db:
+        yield db
+
+def require_verified_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_verified:
         raise HTTPException(status_code=403, detail="Email not verified")
     return current_user
 
-def require_admin_user(current_user: User = Depends(require_verified_user)) -> User:
+async def require_verified_user_async(current_user: Principal = Depends(get_current_user_async)) -> Principal:
+    if not current_user.is_verified:
+        raise HTTPException(status_code=403, detail="Email not verified")
+    return current_user
+
+def require_admin_user(current_user: Principal = Depends(require_verified_user)) -> Principal:
     if current_user.role != "administrator":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
     return current_user
+
+def load_verified_user(current_user: Principal = Depends(require_verified_user), db: Session = Depends(get_db)) -> User:
+    """
+    The full User row for endpoints that read or modify profile data.
+    """
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid user")
+    return user
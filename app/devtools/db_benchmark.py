@@ -0,0 +1,85 @@
+# app/devtools/db_benchmark.py
+#
+# Compares the sync (psycopg2 in Starlette's threadpool) and async (asyncpg) database stacks
+# by running the bill listing queries at increasing concurrency against the configured database.
+# Run with: python -m app.devtools.db_benchmark [--requests N] [--concurrency C [C ...]]
+
+import argparse
+import asyncio
+import statistics
+import time
+import anyio
+from sqlalchemy import select
+from app.core.database import SessionLocal, AsyncSessionLocal, async_engine, engine
+from app.models.bill import Bill
+from app.models.bill_politician import BillPolitician
+
+# Starlette runs sync endpoints and dependencies on anyio's default thread limiter
+THREADPOOL_TOKENS = 40
+
+def list_bills_sync():
+    db = SessionLocal()
+    try:
+        bills = db.execute(select(Bill)).scalars().all()
+        db.execute(select(BillPolitician).where(BillPolitician.bill_id.in_([b.id for b in bills]))).scalars().all()
+    finally:
+        db.close()
+
+async def list_bills_async():
+    async with AsyncSessionLocal() as db:
+        bills = (await db.execute(select(Bill))).scalars().all()
+        (await db.execute(select(BillPolitician).where(BillPolitician.bill_id.in_([b.id for b in bills])))).scalars().all()
+
+async def run_stack(call, requests: int, concurrency: int) -> dict:
+    """
+    Issue requests calls with at most concurrency in flight, like concurrent HTTP clients would.
+    """
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000
+    }
+
+async def main_async(requests: int, concurrency_levels):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_TOKENS
+    stacks = {
+        "sync": lambda: anyio.to_thread.run_sync(list_bills_sync),
+        "async": list_bills_async
+    }
+
+    # Warm up both pools so connection setup isn't measured
+    for call in stacks.values():
+        await run_stack(call, 50, 10)
+
+    print(f"{'stack':<6} {'concurrency':>11} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for concurrency in concurrency_levels:
+        for name, call in stacks.items():
+            result = await run_stack(call, requests, concurrency)
+            print(f"{name:<6} {concurrency:>11} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}")
+
+    await async_engine.dispose()
+    engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sync and async database stacks.")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per stack and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200, 500])
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# app/devtools/explain_check.py
+#
+# Query-plan regression check: seeds synthetic letters, runs EXPLAIN on the hot letter lifecycle
+# queries and exits non-zero if any of them falls back to a sequential scan of a large table.
+# Everything runs in one transaction that is rolled back, so it is safe against a dev database.
+# Run with: python -m app.devtools.explain_check [--letters N] [--no-seed]
+
+import argparse
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects import postgresql
+from app.core.database import SessionLocal
+from app.models.bill import Bill
+from app.models.bill_politician import BillPolitician
+from app.models.mailing_transaction import MailingTransaction, MailingStatus
+from app.models.politician import Politician
+from app.models.queued_letter import QueuedLetter, QueuedLetterStatus
+from app.models.user import User
+from app.models.user_letter_request import UserLetterRequest, LetterStatus
+from app.workers.mailing_dispatcher import next_paid_letter_query
+
+# Tables that grow with letter volume; a sequential scan of any of them is a regression
+GUARDED_TABLES = {"user_letter_requests", "mailing_transactions", "queued_letters", "bill_politicians"}
+
+# Most letters end up mailed; only a few wait in each earlier state
+STATUS_WEIGHTS = {
+    LetterStatus.drafting: 15,
+    LetterStatus.finalized: 10,
+    LetterStatus.paid: 5,
+    LetterStatus.mailed: 70
+}
+
+def _insert(db, model, rows):
+    if rows:
+        db.execute(insert(model), rows)
+
+def seed(db, letters: int, rng: random.Random) -> dict:
+    """
+    Insert that many synthetic letter requests plus the users, bills, politicians, mailing
+    transactions and queued letters around them. Returns sample ids for the hot queries.
+    """
+    now = datetime.now(timezone.utc)
+    users = [{"id": uuid.uuid4(), "email": f"explain-{i}@example.invalid", "password_hash": "x", "role": "user"}
+             for i in range(max(letters // 10, 1))]
+    politicians = [
+        {
+            "id": uuid.uuid4(), "name": f"Politician {i}", "title": "Senator",
+            "office_address_line1": f"{i} Capitol St", "office_city": "Austin", "office_state": "TX",
+            "office_zip": "78701", "legislative_body": "senate"
+        }
+        for i in range(500)
+    ]
+    bills = [{"id": uuid.uuid4(), "title": f"Bill {i}", "bill_number": f"SB {i}", "legislative_body": "senate"}
+             for i in range(200)]
+    bill_politicians = [
+        {"bill_id": bill["id"], "politician_id": politician["id"]}
+        for bill in bills for politician in rng.sample(politicians, 20)
+    ]
+
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    letter_rows, mailing_rows, queued_rows = [], [], []
+    for _ in range(letters):
+        created_at = now - timedelta(minutes=rng.randrange(60 * 24 * 365))
+        status = rng.choices(statuses, weights)[0]
+        letter = {
+            "id": uuid.uuid4(),
+            "user_id": rng.choice(users)["id"],
+            "bill_id": rng.choice(bills)["id"],
+            "politician_id": rng.choice(politicians)["id"],
+            "status": status,
+            "final_letter_text": None if status == LetterStatus.drafting else '{"letter": "Dear Senator,"}',
+            "paid_at": created_at + timedelta(hours=1) if status in (LetterStatus.paid, LetterStatus.mailed) else None,
+            "created_at": created_at
+        }
+        letter_rows.append(letter)
+        if status == LetterStatus.mailed:
+            mailing_rows.append({
+                "id": uuid.uuid4(), "user_letter_request_id": letter["id"],
+                "status": MailingStatus.sent, "created_at": created_at + timedelta(hours=2)
+            })
+        if rng.random() < 0.1:
+            queued_rows.append({
+                "id": uuid.uuid4(), "user_letter_request_id": letter["id"],
+                "status": QueuedLetterStatus.queued if status == LetterStatus.paid else QueuedLetterStatus.processed,
+                "created_at": created_at, "scheduled_for": created_at
+            })
+
+    _insert(db, User, users)
+    _insert(db, Politician, politicians)
+    _insert(db, Bill, bills)
+    _insert(db, BillPolitician, bill_politicians)
+    _insert(db, UserLetterRequest, letter_rows)
+    _insert(db, MailingTransaction, mailing_rows)
+    _insert(db, QueuedLetter, queued_rows)
+
+    return {
+        "user_id": users[0]["id"],
+        "letter_id": letter_rows[0]["id"] if letter_rows else uuid.uuid4(),
+        "politician_id": politicians[0]["id"]
+    }
+
+def existing_samples(db) -> dict:
+    """
+    Sample ids from the data already in the database.
+    """
+    return {
+        "user_id": db.execute(select(UserLetterRequest.user_id).where(UserLetterRequest.user_id.isnot(None)).limit(1)).scalar() or uuid.uuid4(),
+        "letter_id": db.execute(select(UserLetterRequest.id).limit(1)).scalar() or uuid.uuid4(),
+        "politician_id": db.execute(select(BillPolitician.politician_id).limit(1)).scalar() or uuid.uuid4()
+    }
+
+def hot_queries(db, samples: dict) -> dict:
+    """
+    The statements behind the busiest endpoints and workers, keyed by a short description.
+    Worker queries are built by the workers' own functions so the check guards what actually runs.
+    """
+    now = datetime.now(timezone.utc)
+    return {
+        "letters of a user (GET /letter-requests/)": (
+            select(UserLetterRequest.id, UserLetterRequest.created_at)
+            .where(UserLetterRequest.user_id == samples["user_id"])
+            .order_by(UserLetterRequest.created_at, UserLetterRequest.id)
+            .limit(100)
+        ),
+        "next paid letter (mailing dispatcher claim)": next_paid_letter_query(db).statement,
+        "mailing transactions of a letter": (
+            select(MailingTransaction.id, MailingTransaction.status)
+            .where(MailingTransaction.user_letter_request_id == samples["letter_id"])
+        ),
+        "queued letters of a letter": (
+            select(QueuedLetter.id)
+            .where(QueuedLetter.user_letter_request_id == samples["letter_id"])
+        ),
+        "bills of a politician (GET /politicians/{id})": (
+            select(BillPolitician.bill_id)
+            .where(BillPolitician.politician_id == samples["politician_id"])
+        ),
+        "print queue head (POST /queued-letters/claim)": (
+            select(QueuedLetter.id)
+            .where(QueuedLetter.status == QueuedLetterStatus.queued, QueuedLetter.scheduled_for <= now)
+            .order_by(QueuedLetter.priority.desc(), QueuedLetter.scheduled_for, QueuedLetter.id)
+            .limit(1)
+        )
+    }
+
+def seq_scans(plan: dict) -> list:
+    """
+    Names of guarded tables read by a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan tree.
+    """
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in GUARDED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+def explain(db, stmt) -> dict:
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    # Run the literal SQL as-is; text() would read the colons in timestamps as bind parameters
+    return db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()[0]["Plan"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot letter query plans a sequential scan.")
+    parser.add_argument("--letters", type=int, default=20000, help="synthetic letter requests to seed")
+    parser.add_argument("--no-seed", action="store_true", help="explain against the existing data only")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the synthetic data")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        if args.no_seed:
+            samples = existing_samples(db)
+        else:
+            samples = seed(db, args.letters, random.Random(args.seed))
+            db.execute(text("ANALYZE users, politicians, bills, " + ", ".join(sorted(GUARDED_TABLES))))
+
+        for name, stmt in hot_queries(db, samples).items():
+            plan = explain(db, stmt)
+            tables = seq_scans(plan)
+            if tables:
+                failures += 1
+                print(f"FAIL  {name}: sequential scan of {', '.join(tables)}")
+            else:
+                print(f"ok    {name}: {plan['Node Type']} (cost {plan['Total Cost']})")
+    finally:
+        db.rollback()
+        db.close()
+
+    if failures:
+        print(f"{failures} hot queries fall back to a sequential scan.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
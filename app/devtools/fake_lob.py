@@ -0,0 +1,217 @@
+# app/devtools/fake_lob.py
+#
+# In-memory stand-in for the parts of the Lob API this app uses, for local development and load tests.
+# Run with: python -m app.devtools.fake_lob [port]
+# and set LOB_BASE_URL=http://localhost:12112/v1 in the .env.
+#
+# POST /v1/letters honours the Idempotency-Key header: a repeated key returns the letter it created.
+# GET /_calls returns the number of API calls received per endpoint plus the letters actually created;
+# POST /_reset clears all state.
+# POST /_faults with kind=<fault> (and optionally count=N, delay=SECONDS) makes the next N letter
+# requests fail. Faults are used in the order they were added:
+#   timeout         sleep for delay seconds before answering, without creating the letter
+#   timeout_after   create the letter, then sleep for delay seconds, like a reply lost on the way back
+#   429, 500, 503…  answer with that status, without creating the letter
+#   bad_json        create the letter and answer 200 with a body that isn't JSON
+
+import email.parser
+import json
+import logging
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 12112
+# Longer than HTTP_READ_TIMEOUT_SECONDS, so the client gives up first
+DEFAULT_FAULT_DELAY_SECONDS = 35.0
+
+def nest_fields(fields) -> dict:
+    """
+    Turn Lob's bracketed form fields ("to[address_line1]=...") into nested dicts.
+    """
+    result = {}
+    for key, value in fields:
+        parts = key.replace("]", "").split("[")
+        node = result
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return result
+
+def decode_multipart(content_type: str, body: bytes) -> dict:
+    """
+    The text fields of a multipart/form-data body, nested; uploaded files are skipped.
+    """
+    message = email.parser.BytesParser().parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+    )
+    fields = []
+    for part in message.get_payload() if message.is_multipart() else []:
+        if part.get_filename() is None and part.get_param("name", header="content-disposition"):
+            fields.append((part.get_param("name", header="content-disposition"), part.get_payload(decode=True).decode("utf-8")))
+    return nest_fields(fields)
+
+class FakeLob:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.letters = {}
+        self.by_idempotency_key = {}
+        self.faults = deque()
+        self.calls = Counter()
+
+    def add_faults(self, params: dict) -> int:
+        count = int(params.get("count", 1))
+        delay = float(params.get("delay", DEFAULT_FAULT_DELAY_SECONDS))
+        self.faults.extend([(params["kind"], delay)] * count)
+        return len(self.faults)
+
+    def next_fault(self):
+        return self.faults.popleft() if self.faults else (None, 0.0)
+
+    def create_letter(self, params: dict, idempotency_key: str = None) -> dict:
+        """
+        Create a letter, or return the one an earlier request with the same idempotency key created.
+        """
+        if idempotency_key and idempotency_key in self.by_idempotency_key:
+            self.calls["idempotent replays"] += 1
+            return self.letters[self.by_idempotency_key[idempotency_key]]
+
+        now = datetime.now(timezone.utc)
+        letter_id = "ltr_" + secrets.token_hex(10)
+        letter = {
+            "id": letter_id,
+            "object": "letter",
+            "description": params.get("description"),
+            "to": params.get("to") or {},
+            "from": params.get("from") or {},
+            "metadata": params.get("metadata") or {},
+            "color": params.get("color") == "true",
+            "double_sided": params.get("double_sided") == "true",
+            "use_type": params.get("use_type"),
+            "date_created": now.isoformat(),
+            "send_date": now.isoformat(),
+            "expected_delivery_date": (now + timedelta(days=5)).date().isoformat()
+        }
+        self.letters[letter_id] = letter
+        if idempotency_key:
+            self.by_idempotency_key[idempotency_key] = letter_id
+        self.calls["letters created"] += 1
+        return letter
+
+    def list_letters(self, params: dict) -> dict:
+        """
+        Newest first, filtered by metadata[<key>]=<value> like the real list endpoint.
+        """
+        limit = max(1, min(int(params.get("limit", 10)), 100))
+        metadata = params.get("metadata") or {}
+        matching = [
+            letter for letter in reversed(self.letters.values())
+            if all(letter["metadata"].get(key) == value for key, value in metadata.items())
+        ]
+        return {"object": "list", "data": matching[:limit], "count": min(len(matching), limit)}
+
+class Handler(BaseHTTPRequestHandler):
+    lob: FakeLob = None
+
+    def _send(self, status: int, body):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on an injected timeout
+            pass
+
+    def _error(self, status: int, message: str):
+        self._send(status, {"error": {"message": message, "status_code": status}})
+
+    def _not_found(self):
+        self._error(404, f"Unrecognized request URL ({self.path})")
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        lob = self.lob
+        with lob.lock:
+            if path == "/_calls":
+                return self._send(200, dict(lob.calls))
+            if path == "/v1/letters":
+                lob.calls["GET /v1/letters"] += 1
+                return self._send(200, lob.list_letters(nest_fields(parse_qsl(url.query))))
+            if path.startswith("/v1/letters/"):
+                lob.calls["GET /v1/letters/{id}"] += 1
+                letter = lob.letters.get(path.rsplit("/", 1)[-1])
+                return self._send(200, letter) if letter else self._not_found()
+        self._not_found()
+
+    def do_POST(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        body = self._body()
+        lob = self.lob
+        if path == "/v1/letters":
+            return self._post_letter(body)
+        with lob.lock:
+            if path == "/_reset":
+                lob.reset()
+                return self._send(200, {})
+            if path == "/_faults":
+                params = dict(parse_qsl(body.decode("utf-8")))
+                if not params.get("kind"):
+                    return self._error(422, "kind is required")
+                return self._send(200, {"pending_faults": lob.add_faults(params)})
+        self._not_found()
+
+    def _post_letter(self, body: bytes):
+        lob = self.lob
+        params = decode_multipart(self.headers.get("Content-Type", ""), body)
+        with lob.lock:
+            lob.calls["POST /v1/letters"] += 1
+            kind, delay = lob.next_fault()
+            letter = None
+            if kind in (None, "timeout_after", "bad_json"):
+                letter = lob.create_letter(params, self.headers.get("Idempotency-Key"))
+
+        # Sleep outside the lock so other requests keep being served
+        if kind in ("timeout", "timeout_after"):
+            time.sleep(delay)
+        if kind is not None and kind.isdigit():
+            return self._error(int(kind), f"Injected {kind} response")
+        if kind == "bad_json":
+            return self._send(200, b"<html>Bad gateway</html>")
+        if letter is None:
+            return self._error(504, "Injected timeout")
+        self._send(200, letter)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    Handler.lob = FakeLob()
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    logger.info("Fake Lob listening on http://localhost:%d/v1", port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
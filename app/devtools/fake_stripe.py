@@ -0,0 +1,205 @@
+# app/devtools/fake_stripe.py
+#
+# In-memory stand-in for the parts of the Stripe API this app uses, for local development and load tests.
+# Run with: python -m app.devtools.fake_stripe [port]
+# and set STRIPE_API_BASE=http://localhost:12111 in the .env.
+#
+# GET /_calls returns the number of API calls received per endpoint; POST /_reset clears all state.
+# POST /_sessions/{id}/complete marks a checkout session paid, as if the customer had finished checkout.
+# POST /_seed with count=N (and optionally paid=false) creates N completed single-letter sessions for
+# letter_request_ids=<comma-separated ids>, or random ids when none are given, for reconciliation runs.
+
+import json
+import logging
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 12111
+SESSION_TTL_SECONDS = 24 * 3600
+
+def decode_form(body: str) -> dict:
+    """
+    Decode Stripe's form encoding ("line_items[0][price_data][currency]=usd") into nested dicts and lists.
+    """
+    result = {}
+    for key, value in parse_qsl(body, keep_blank_values=True):
+        parts = key.replace("]", "").split("[")
+        node = result
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+
+    def listify(node):
+        if not isinstance(node, dict):
+            return node
+        if node and all(k.isdigit() for k in node):
+            return [listify(node[k]) for k in sorted(node, key=int)]
+        return {k: listify(v) for k, v in node.items()}
+
+    return listify(result)
+
+class FakeStripe:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.sessions = {}
+        # Session ids in creation order, and each id's position in it, so list pages start in O(1)
+        self.order = []
+        self.positions = {}
+        self.calls = Counter()
+
+    def create_session(self, params: dict) -> dict:
+        now = int(time.time())
+        line_items = params.get("line_items") or []
+        amount_total = sum(
+            int(item.get("price_data", {}).get("unit_amount", 0)) * int(item.get("quantity", 1))
+            for item in line_items
+        )
+        session_id = "cs_test_" + secrets.token_hex(12)
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "created": now,
+            "expires_at": now + SESSION_TTL_SECONDS,
+            "status": "open",
+            "payment_status": "unpaid",
+            "mode": params.get("mode", "payment"),
+            "currency": "usd",
+            "amount_total": amount_total,
+            "payment_intent": None,
+            "success_url": params.get("success_url"),
+            "cancel_url": params.get("cancel_url"),
+            "metadata": params.get("metadata") or {},
+            "url": f"{self.base_url}/pay/{session_id}"
+        }
+        self.sessions[session_id] = session
+        self.positions[session_id] = len(self.order)
+        self.order.append(session_id)
+        return session
+
+    def list_sessions(self, params: dict) -> dict:
+        """
+        Newest first, paginated with limit and starting_after like the real list endpoint.
+        """
+        limit = max(1, min(int(params.get("limit", 10)), 100))
+        created_gte = int((params.get("created") or {}).get("gte", 0))
+        status = params.get("status")
+        start = len(self.order)
+        if params.get("starting_after"):
+            start = self.positions[params["starting_after"]]
+        ordered = (self.sessions[self.order[i]] for i in range(start - 1, -1, -1))
+        matching = (
+            session for session in ordered
+            if session["created"] >= created_gte and (status is None or session["status"] == status)
+        )
+        data = []
+        for session in matching:
+            if len(data) == limit:
+                return {"object": "list", "url": "/v1/checkout/sessions", "has_more": True, "data": data}
+            data.append(session)
+        return {"object": "list", "url": "/v1/checkout/sessions", "has_more": False, "data": data}
+
+    def seed_sessions(self, params: dict) -> int:
+        letter_ids = [i for i in params.get("letter_request_ids", "").split(",") if i]
+        count = int(params.get("count", len(letter_ids)))
+        for n in range(count):
+            letter_id = letter_ids[n % len(letter_ids)] if letter_ids else str(uuid.uuid4())
+            session = self.create_session({
+                "line_items": [{"price_data": {"unit_amount": "500"}, "quantity": "1"}],
+                "metadata": {"letter_request_id": letter_id}
+            })
+            if params.get("paid", "true") != "false":
+                self.complete_session(session["id"])
+        return count
+
+    def complete_session(self, session_id: str) -> dict:
+        session = self.sessions[session_id]
+        session.update(
+            status="complete",
+            payment_status="paid",
+            payment_intent="pi_test_" + secrets.token_hex(12),
+            url=None
+        )
+        return session
+
+class Handler(BaseHTTPRequestHandler):
+    stripe: FakeStripe = None
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self):
+        self._send(404, {"error": {"type": "invalid_request_error", "message": f"Unrecognized request URL ({self.path})"}})
+
+    def _params(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return decode_form(self.rfile.read(length).decode("utf-8"))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        stripe = self.stripe
+        with stripe.lock:
+            if path == "/_calls":
+                return self._send(200, dict(stripe.calls))
+            if path == "/v1/checkout/sessions":
+                stripe.calls["GET /v1/checkout/sessions"] += 1
+                return self._send(200, stripe.list_sessions(decode_form(url.query)))
+            if path.startswith("/v1/checkout/sessions/"):
+                stripe.calls["GET /v1/checkout/sessions/{id}"] += 1
+                session = stripe.sessions.get(path.rsplit("/", 1)[-1])
+                return self._send(200, session) if session else self._not_found()
+        self._not_found()
+
+    def do_POST(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        params = self._params()
+        stripe = self.stripe
+        with stripe.lock:
+            if path == "/_reset":
+                stripe.reset()
+                return self._send(200, {})
+            if path.startswith("/_sessions/") and path.endswith("/complete"):
+                session_id = path.split("/")[2]
+                if session_id not in stripe.sessions:
+                    return self._not_found()
+                return self._send(200, stripe.complete_session(session_id))
+            if path == "/_seed":
+                return self._send(200, {"created": stripe.seed_sessions(params)})
+            if path == "/v1/checkout/sessions":
+                stripe.calls["POST /v1/checkout/sessions"] += 1
+                return self._send(200, stripe.create_session(params))
+        self._not_found()
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    Handler.stripe = FakeStripe(f"http://localhost:{port}")
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    logger.info("Fake Stripe listening on http://localhost:%d", port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
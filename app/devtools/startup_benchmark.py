@@ -0,0 +1,113 @@
+# app/devtools/startup_benchmark.py
+#
+# Measures cold start: importing app.main and serving the first request, each in a fresh
+# interpreter the way a newly scaled-out worker would. Fails if the median exceeds the budget
+# or if importing the app pulls in an integration that should only load on first use.
+# Run with: python -m app.devtools.startup_benchmark [--runs N] [--budget-ms MS]
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Heavy integrations the services import on first use; none may load with the app
+LAZY_MODULES = ["langchain_ollama", "bs4", "stripe", "pdfkit", "cups", "PIL"]
+
+async def first_request(app) -> int:
+    """
+    Send GET / straight to the ASGI app, without a server or HTTP client, and return the status.
+    """
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/", "raw_path": b"/", "query_string": b"", "root_path": "",
+        "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000)
+    }
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+def child():
+    """
+    One cold start, printed as a JSON line for the parent to collect.
+    """
+    start = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+    status = asyncio.run(first_request(app))
+    served = time.perf_counter()
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "first_request_ms": (served - start) * 1000,
+        "status": status,
+        "eager_modules": [name for name in LAZY_MODULES if name in sys.modules]
+    }))
+
+def slowest_imports(top: int) -> list:
+    """
+    The top modules by cumulative import time, from python -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark time to first request of a fresh app process.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--budget-ms", type=float, default=2000.0, help="fail if the median time to first request exceeds this")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        result = subprocess.run(
+            [sys.executable, "-m", "app.devtools.startup_benchmark", "--child"],
+            capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    first_request_ms = statistics.median(run["first_request_ms"] for run in runs)
+    print(f"import app.main: {import_ms:.0f} ms, first request: {first_request_ms:.0f} ms (median of {len(runs)})")
+
+    print(f"{'cumulative ms':>13}  module")
+    for cumulative_ms, name in slowest_imports(args.top):
+        print(f"{cumulative_ms:>13.1f}  {name}")
+
+    failures = []
+    eager = sorted({name for run in runs for name in run["eager_modules"]})
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if any(run["status"] != 200 for run in runs):
+        failures.append("GET / did not return 200")
+    if first_request_ms > args.budget_ms:
+        failures.append(f"first request took {first_request_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL  {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
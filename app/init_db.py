@@ -0,0 +1,40 @@
+# app/init_db.py
+#
+# Brings the database schema up to date. The app no longer creates tables on import,
+# so run this once per deploy before starting new app processes.
+# Run with: python -m app.init_db
+
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.core.database import Base, engine
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+
+def alembic_config() -> Config:
+    config = Config(str(ALEMBIC_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return config
+
+def init_db():
+    """
+    Run pending migrations. An empty database is instead created from the models and stamped at
+    head, since the early migrations alter tables that predate Alembic.
+    """
+    config = alembic_config()
+    tables = set(inspect(engine).get_table_names())
+    if "alembic_version" in tables:
+        command.upgrade(config, "head")
+    elif not tables & set(Base.metadata.tables):
+        Base.metadata.create_all(bind=engine)
+        command.stamp(config, "head")
+    else:
+        raise SystemExit(
+            "Found application tables but no alembic_version table. "
+            "Run `alembic stamp <revision>` for the revision the schema matches, then retry."
+        )
+
+if __name__ == "__main__":
+    init_db()
@@ -1,7 +1,7 @@
 # app/main.py
 
-from fastapi import FastAPI
-from app.core.database import Base, engine
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.models.user import User
 from app.models.bill import Bill
 from app.models.politician import Politician
@@ -13,15 +13,21 @@ from uuid import UUID
 from app.models.user import User
 from app.models.otp_code import OTPCode
 from app.routers import users
+from app.routers import metrics
+from app.core.bounded_executor import ExecutorBusy
+from app.core.db_routing import ReadYourWritesMiddleware
 from app.models.global_return_address import GlobalReturnAddress
+from app.models.lob_event import LobEvent
+from app.models.email_outbox import EmailOutbox
+from app.models.user_photo import UserPhoto
+from app.models.stripe_event import StripeEvent
 
 
 # Import the bills router
 from app.routers import bills, politicians, user_letter_requests, webhooks
 
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(title="LetterLobby")
+app.add_middleware(ReadYourWritesMiddleware)
 
 # Include the bills router
 app.include_router(bills.router)
@@ -31,7 +37,16 @@ app.include_router(webhooks.router)
 app.include_router(queued_letters.router)
 app.include_router(users.router)
 app.include_router(global_return_address.router)
+app.include_router(metrics.router)
+
 
+@app.exception_handler(ExecutorBusy)
+def executor_busy_handler(request: Request, exc: ExecutorBusy):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Server is busy, please retry shortly."},
+        headers={"Retry-After": "1"}
+    )
 
 @app.get("/")
 def read_root():
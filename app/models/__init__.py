@@ -0,0 +1,15 @@
+# Import every model so relationship() targets referenced by name are always registered,
+# including in workers and scripts that only import a few models directly.
+from app.models.user import User
+from app.models.bill import Bill
+from app.models.politician import Politician
+from app.models.user_letter_request import UserLetterRequest
+from app.models.otp_code import OTPCode
+from app.models.mailing_transaction import MailingTransaction
+from app.models.queued_letter import QueuedLetter
+from app.models.bill_politician import BillPolitician
+from app.models.global_return_address import GlobalReturnAddress
+from app.models.lob_event import LobEvent
+from app.models.email_outbox import EmailOutbox
+from app.models.user_photo import UserPhoto
+from app.models.stripe_event import StripeEvent
@@ -10,7 +10,8 @@ class BillPolitician(Base):
     __tablename__ = "bill_politicians"
 
     bill_id = Column(UUID(as_uuid=True), ForeignKey("bills.id", ondelete="CASCADE"), primary_key=True)
-    politician_id = Column(UUID(as_uuid=True), ForeignKey("politicians.id", ondelete="CASCADE"), primary_key=True)
+    # The primary key index leads with bill_id, so lookups by politician need their own
+    politician_id = Column(UUID(as_uuid=True), ForeignKey("politicians.id", ondelete="CASCADE"), primary_key=True, index=True)
     does_support = Column(Boolean, nullable=True)
 
     bill = relationship("Bill", back_populates="bill_politicians_assocs")
@@ -0,0 +1,34 @@
+# app/models/email_outbox.py
+
+import uuid
+from sqlalchemy import Column, String, Text, DateTime, Enum, Integer, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+from enum import Enum as PyEnum
+from app.core.database import Base
+
+class EmailStatus(PyEnum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+    # The send's outcome is unknown (e.g. a read timeout after Mailgun may have accepted it);
+    # never retried automatically, since that could deliver twice. Check the Mailgun logs.
+    unconfirmed = "unconfirmed"
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    to_address = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(Enum(EmailStatus), nullable=False, default=EmailStatus.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(String, nullable=True)
+    provider_message_id = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_due", "next_attempt_at", postgresql_where=status == EmailStatus.pending),
+    )
@@ -0,0 +1,34 @@
+# app/models/lob_event.py
+
+from sqlalchemy import Column, String, DateTime, Integer, JSON, Index, func
+from app.core.database import Base
+
+class LobEvent(Base):
+    """
+    Append-only log of Lob tracking webhooks. Rows are inserted by /lob-webhook and marked
+    applied once the background applier has folded them into MailingTransaction. Events whose
+    letter isn't known yet are retried with backoff, then dead-lettered.
+    """
+    __tablename__ = "lob_events"
+
+    id = Column(String, primary_key=True)  # Lob event id, e.g. "evt_..."
+    event_type = Column(String, nullable=False)  # e.g. "letter.mailed"
+    resource_id = Column(String, nullable=True)  # Lob letter id, matches MailingTransaction.external_mail_service_id
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    payload = Column(JSON, nullable=False)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    applied_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Attempts to match the event to a MailingTransaction, which may not be committed yet when it arrives
+    attempts = Column(Integer, nullable=False, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Set once LOB_EVENT_MAX_ATTEMPTS is reached, or straight away for events without a resource id
+    dead_lettered_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_lob_events_unapplied", "received_at",
+            postgresql_where=applied_at.is_(None) & dead_lettered_at.is_(None)
+        ),
+    )
@@ -10,17 +10,27 @@ class MailingStatus(PyEnum):
     pending = "pending"
     sent = "sent"
     failed = "failed"
+    # Lob may or may not have accepted the letter (e.g. a read timeout); never retried blindly
+    unconfirmed = "unconfirmed"
 
 class MailingTransaction(Base):
     __tablename__ = "mailing_transactions"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_letter_request_id = Column(UUID(as_uuid=True), ForeignKey("user_letter_requests.id"), nullable=False)
+    user_letter_request_id = Column(UUID(as_uuid=True), ForeignKey("user_letter_requests.id"), nullable=False, index=True)
 
-    external_mail_service_id = Column(String, nullable=True)
+    external_mail_service_id = Column(String, nullable=True, index=True)
+    # Sent to Lob as the Idempotency-Key header; deterministic per letter so retries never mail twice
+    idempotency_key = Column(String, nullable=True)
     status = Column(Enum(MailingStatus), default=MailingStatus.pending)
     error_message = Column(String, nullable=True)
     mail_service_response = Column(JSON, nullable=True)  # Added JSON column
+    # Set on a failed or unconfirmed attempt when an administrator retries the letter; the dispatcher then ignores it
+    retried_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Latest Lob tracking event, e.g. "mailed", "in_transit", "delivered", "returned_to_sender"
+    tracking_status = Column(String, nullable=True)
+    tracking_updated_at = Column(DateTime(timezone=True), nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -12,3 +12,12 @@ class OTPCode(Base):
     code = Column(String, nullable=False)
     purpose = Column(String, nullable=False)  # e.g. "verify_email", "reset_password"
     expires_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Covers consume_otp_code lookups; id and expires_at are included so they can be index-only scans
+        Index(
+            "ix_otp_codes_user_id_purpose_code", "user_id", "purpose", "code",
+            postgresql_include=["expires_at", "id"]
+        ),
+        Index("ix_otp_codes_expires_at", "expires_at"),
+    )
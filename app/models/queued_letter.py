@@ -1,7 +1,7 @@
 # app/models/queued_letter.py
 
 import uuid
-from sqlalchemy import Column, ForeignKey, DateTime, func, Enum
+from sqlalchemy import Column, ForeignKey, DateTime, Integer, func, Enum, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
@@ -15,8 +15,25 @@ class QueuedLetter(Base):
     __tablename__ = "queued_letters"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_letter_request_id = Column(UUID(as_uuid=True), ForeignKey("user_letter_requests.id"), nullable=False)
+    user_letter_request_id = Column(UUID(as_uuid=True), ForeignKey("user_letter_requests.id"), nullable=False, index=True)
     status = Column(Enum(QueuedLetterStatus), default=QueuedLetterStatus.queued)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Print queue ordering: higher priority first, and never before scheduled_for
+    priority = Column(Integer, nullable=False, server_default="0")
+    scheduled_for = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Set when a print batch claims the letter; the claim lapses after PRINT_QUEUE_CLAIM_LEASE_SECONDS
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+
     user_letter_request = relationship("UserLetterRequest", backref="queued_letters")
+
+    __table_args__ = (
+        # Keyset pagination of the queue listing, with and without a status filter
+        Index("ix_queued_letters_created_at_id", "created_at", "id"),
+        Index("ix_queued_letters_status_created_at_id", "status", "created_at", "id"),
+        # Claim order of the print queue
+        Index(
+            "ix_queued_letters_claimable", priority.desc(), "scheduled_for", "id",
+            postgresql_where=text("status = 'queued'")
+        ),
+    )
@@ -0,0 +1,22 @@
+# app/models/stripe_event.py
+
+from sqlalchemy import Column, String, DateTime, JSON, Index, func
+from app.core.database import Base
+
+class StripeEvent(Base):
+    """
+    Deduplicated log of Stripe webhooks keyed by event id. Rows are inserted by /stripe-webhook
+    and marked applied once the background applier has processed them.
+    """
+    __tablename__ = "stripe_events"
+
+    id = Column(String, primary_key=True)  # Stripe event id, e.g. "evt_..."
+    event_type = Column(String, nullable=False)  # e.g. "checkout.session.completed"
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    payload = Column(JSON, nullable=False)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    applied_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_stripe_events_unapplied", "received_at", postgresql_where=applied_at.is_(None)),
+    )
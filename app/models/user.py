@@ -1,9 +1,10 @@
 # app/models/user.py
 
 import uuid
-from sqlalchemy import Column, Date, LargeBinary, String, DateTime, Boolean, Integer, JSON
+from sqlalchemy import Column, Date, String, DateTime, Boolean, Integer, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
+from sqlalchemy.orm import deferred
 from app.core.database import Base
 
 class User(Base):
@@ -30,8 +31,8 @@ class User(Base):
     state = Column(String)
     zipcode = Column(String)
     
-    profile_photo = Column(LargeBinary)      # Store binary for the image after resizing
-    thumbnail_photo = Column(LargeBinary)    # binary for thumbnail image
+    # Images live in user_photos; this is the current photo's etag, or None when there is no photo
+    photo_etag = Column(String)
     personal_description = Column(String)
     political_party = Column(String)
     date_of_birth = Column(Date)
@@ -44,7 +45,8 @@ class User(Base):
     occupation = Column(String)
     employer = Column(String)
     website_url = Column(String)
-    social_media_handles = Column(JSON)   # e.g. {"twitter": "@handle", "linkedin": "url"}
+    # JSON columns are deferred and load together on first access, so auth and lookup queries skip them
+    social_media_handles = deferred(Column(JSON), group="profile_json")   # e.g. {"twitter": "@handle", "linkedin": "url"}
     preferred_contact_method = Column(String)  # e.g. "email", "cell", etc.
-    interests = Column(JSON)  # e.g. ["reading","hiking","coding"]
+    interests = deferred(Column(JSON), group="profile_json")  # e.g. ["reading","hiking","coding"]
     preferred_language = Column(String)   # e.g. "en", "es"
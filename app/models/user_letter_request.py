@@ -1,7 +1,7 @@
 # app/models/user_letter_request.py
 
 import uuid
-from sqlalchemy import Column, ForeignKey, String, Text, DateTime, Enum, Boolean, func
+from sqlalchemy import Column, ForeignKey, String, Text, DateTime, Enum, Boolean, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
@@ -17,9 +17,9 @@ class UserLetterRequest(Base):
     __tablename__ = "user_letter_requests"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
-    bill_id = Column(UUID(as_uuid=True), ForeignKey("bills.id"), nullable=False)
-    politician_id = Column(UUID(as_uuid=True), ForeignKey("politicians.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True)
+    bill_id = Column(UUID(as_uuid=True), ForeignKey("bills.id"), nullable=False, index=True)
+    politician_id = Column(UUID(as_uuid=True), ForeignKey("politicians.id"), nullable=False, index=True)
 
     # Removed user_provided_* fields and user_comments
     final_letter_text = Column(Text, nullable=True)
@@ -27,6 +27,11 @@ class UserLetterRequest(Base):
     stripe_charge_id = Column(String, nullable=True)
     paid_at = Column(DateTime(timezone=True), nullable=True)
 
+    # Most recent Stripe Checkout session, reused while it is open so repeated /pay calls don't create new ones
+    checkout_session_id = Column(String, nullable=True)
+    checkout_session_url = Column(String, nullable=True)
+    checkout_session_expires_at = Column(DateTime(timezone=True), nullable=True)
+
     # New field to indicate whether to use the user's profile return address or the global default
     use_profile_return_address = Column(Boolean, nullable=False, server_default='true')
 
@@ -37,3 +42,8 @@ class UserLetterRequest(Base):
     user = relationship("User", backref="letter_requests")
     bill = relationship("Bill", backref="letter_requests")
     politician = relationship("Politician", backref="letter_requests")
+
+    __table_args__ = (
+        # Status filters, and the mailing dispatcher's oldest-paid-first claim
+        Index("ix_user_letter_requests_status_paid_at", "status", "paid_at"),
+    )
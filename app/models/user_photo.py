@@ -0,0 +1,18 @@
+# app/models/user_photo.py
+
+from sqlalchemy import Column, String, DateTime, ForeignKey, LargeBinary, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class UserPhoto(Base):
+    """
+    Profile images, kept off the users row so loading a user never drags the blobs along.
+    """
+    __tablename__ = "user_photos"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String, primary_key=True)  # "photo" or "thumbnail"
+    content_type = Column(String, nullable=False)
+    etag = Column(String, nullable=False)  # sha256 of data
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
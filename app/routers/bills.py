@@ -1,20 +1,26 @@
 # app/routers/bills.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
 from app.models.bill import Bill
 from app.models.bill_politician import BillPolitician
 from app.models.politician import Politician
 from app.schemas.bill import BillCreate, BillOut, BillUpdate, BillPoliticianAssociationOut
-from app.dependencies import get_current_user, require_verified_user
-from app.models.user import User
+from app.services.projection import parse_fields, select_fields_async
+from app.dependencies import get_current_user, require_verified_user, get_async_read_db
+from app.services.principal_cache import Principal
 
 router = APIRouter(prefix="/bills", tags=["bills"])
 
-def require_admin_user(current_user: User = Depends(require_verified_user)) -> User:
+def require_admin_user(current_user: Principal = Depends(require_verified_user)) -> Principal:
     if current_user.role != "administrator":
         raise HTTPException(status_code=403, detail="Admin privilege required")
     return current_user
@@ -40,10 +46,7 @@ def set_bill_politicians(db: Session, bill: Bill, assoc_data: List[BillPoliticia
             db.add(assoc)
         db.commit()
 
-def bill_to_out(db: Session, bill: Bill) -> BillOut:
-    assocs = db.query(BillPolitician).filter(BillPolitician.bill_id == bill.id).all()
-    politician_out = [{"politician_id": a.politician_id, "does_support": a.does_support} for a in assocs]
-
+def bill_out(bill: Bill, politicians: List[dict]) -> BillOut:
     return BillOut(
         title=bill.title,
         description=bill.description,
@@ -53,14 +56,19 @@ def bill_to_out(db: Session, bill: Bill) -> BillOut:
         id=bill.id,
         created_at=bill.created_at,
         updated_at=bill.updated_at,
-        politicians=politician_out
+        politicians=politicians
     )
 
+def bill_to_out(db: Session, bill: Bill) -> BillOut:
+    assocs = db.query(BillPolitician).filter(BillPolitician.bill_id == bill.id).all()
+    politician_out = [{"politician_id": a.politician_id, "does_support": a.does_support} for a in assocs]
+    return bill_out(bill, politician_out)
+
 @router.post("/", response_model=BillOut, status_code=status.HTTP_201_CREATED)
 def create_bill(
     bill_data: BillCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin_user)
+    current_user: Principal = Depends(require_admin_user)
 ):
     bill = Bill(
         title=bill_data.title,
@@ -79,24 +87,60 @@ def create_bill(
 
     return bill_to_out(db, bill)
 
+BILL_COLUMNS = {
+    name: getattr(Bill, name)
+    for name in ("id", "title", "description", "bill_number", "legislative_body", "status", "created_at", "updated_at")
+}
+
+async def politicians_by_bill(db: AsyncSession, bill_ids: List[UUID]) -> dict:
+    # One IN query for the associations of every listed bill
+    result = await db.execute(select(BillPolitician).where(BillPolitician.bill_id.in_(bill_ids)))
+    by_bill = defaultdict(list)
+    for a in result.scalars():
+        by_bill[a.bill_id].append({"politician_id": a.politician_id, "does_support": a.does_support})
+    return by_bill
+
+async def list_bills_projected(db: AsyncSession, fields: List[str]) -> List[dict]:
+    with_politicians = "politicians" in fields
+    rows = await select_fields_async(db, select(Bill), BILL_COLUMNS, fields + ["id"] if with_politicians else fields)
+    if with_politicians:
+        by_bill = await politicians_by_bill(db, [r["id"] for r in rows])
+        for r in rows:
+            r["politicians"] = by_bill[r["id"]]
+            if "id" not in fields:
+                del r["id"]
+    return rows
+
 @router.get("/", response_model=List[BillOut])
-def list_bills(db: Session = Depends(get_db)):
-    bills = db.query(Bill).all()
-    return [bill_to_out(db, b) for b in bills]
+async def list_bills(
+    fields: Optional[str] = Query(None, description="Comma-separated BillOut fields to return"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        requested = parse_fields(fields, BillOut.model_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if requested:
+        return JSONResponse(content=jsonable_encoder(await list_bills_projected(db, requested)))
+
+    bills = (await db.execute(select(Bill))).scalars().all()
+    by_bill = await politicians_by_bill(db, [b.id for b in bills])
+    return [bill_out(b, by_bill[b.id]) for b in bills]
 
 @router.get("/{bill_id}", response_model=BillOut)
-def get_bill(bill_id: UUID, db: Session = Depends(get_db)):
-    bill = db.query(Bill).filter(Bill.id == bill_id).first()
+async def get_bill(bill_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
+    bill = await db.get(Bill, bill_id)
     if not bill:
         raise HTTPException(status_code=404, detail="Bill not found")
-    return bill_to_out(db, bill)
+    by_bill = await politicians_by_bill(db, [bill.id])
+    return bill_out(bill, by_bill[bill.id])
 
 @router.patch("/{bill_id}", response_model=BillOut)
 def update_bill(
     bill_id: UUID,
     updates: BillUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin_user)
+    current_user: Principal = Depends(require_admin_user)
 ):
     bill = db.query(Bill).filter(Bill.id == bill_id).first()
     if not bill:
@@ -126,7 +170,7 @@ def update_bill(
 def delete_bill(
     bill_id: UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin_user)
+    current_user: Principal = Depends(require_admin_user)
 ):
     bill = db.query(Bill).filter(Bill.id == bill_id).first()
     if not bill:
@@ -6,12 +6,12 @@ from uuid import UUID
 from app.core.database import get_db
 from app.models.global_return_address import GlobalReturnAddress
 from app.schemas.global_return_address import GlobalReturnAddressCreate, GlobalReturnAddressOut, GlobalReturnAddressUpdate
-from app.models.user import User
+from app.services.principal_cache import Principal
 from app.dependencies import require_verified_user
 
 router = APIRouter(prefix="/global-return-address", tags=["global_return_address"])
 
-def is_admin(current_user: User) -> bool:
+def is_admin(current_user: Principal) -> bool:
     return current_user.role == "administrator"
 
 def get_global_return_address_or_404(db: Session) -> GlobalReturnAddress:
@@ -23,7 +23,7 @@ def get_global_return_address_or_404(db: Session) -> GlobalReturnAddress:
 @router.get("/", response_model=GlobalReturnAddressOut)
 def get_global_return_address(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     if not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -36,7 +36,7 @@ def get_global_return_address(
 def create_global_return_address(
     data: GlobalReturnAddressCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     if not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -55,7 +55,7 @@ def create_global_return_address(
 def update_global_return_address(
     data: GlobalReturnAddressUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     if not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -73,7 +73,7 @@ def update_global_return_address(
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
 def delete_global_return_address(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     if not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not authorized")
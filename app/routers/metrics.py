@@ -0,0 +1,12 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter, Depends
+from app.core.metrics import registry
+from app.dependencies import require_admin_user
+from app.services.principal_cache import Principal
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/")
+def get_metrics(current_user: Principal = Depends(require_admin_user)):
+    return registry.snapshot()
@@ -1,20 +1,26 @@
 # app/routers/politicians.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
 from app.models.politician import Politician
 from app.models.bill_politician import BillPolitician
 from app.models.bill import Bill
 from app.schemas.politician import PoliticianCreate, PoliticianUpdate, PoliticianOut, PoliticianBillAssociationOut
-from app.dependencies import get_current_user, require_verified_user
-from app.models.user import User
+from app.services.projection import parse_fields, select_fields_async
+from app.dependencies import get_current_user, require_verified_user, get_async_read_db
+from app.services.principal_cache import Principal
 
 router = APIRouter(prefix="/politicians", tags=["politicians"])
 
-def require_admin_user(current_user: User = Depends(require_verified_user)) -> User:
+def require_admin_user(current_user: Principal = Depends(require_verified_user)) -> Principal:
     if current_user.role != "administrator":
         raise HTTPException(status_code=403, detail="Admin privilege required")
     return current_user
@@ -39,10 +45,7 @@ def set_politician_bills(db: Session, politician: Politician, bills_data: List[P
             db.add(assoc)
         db.commit()
 
-def politician_to_out(db: Session, politician: Politician) -> PoliticianOut:
-    assocs = db.query(BillPolitician).filter(BillPolitician.politician_id == politician.id).all()
-    bills_out = [{"bill_id": a.bill_id, "does_support": a.does_support} for a in assocs]
-
+def politician_out(politician: Politician, bills: List[dict]) -> PoliticianOut:
     return PoliticianOut(
         name=politician.name,
         title=politician.title,
@@ -56,14 +59,19 @@ def politician_to_out(db: Session, politician: Politician) -> PoliticianOut:
         id=politician.id,
         created_at=politician.created_at,
         updated_at=politician.updated_at,
-        bills=bills_out
+        bills=bills
     )
 
+def politician_to_out(db: Session, politician: Politician) -> PoliticianOut:
+    assocs = db.query(BillPolitician).filter(BillPolitician.politician_id == politician.id).all()
+    bills_out = [{"bill_id": a.bill_id, "does_support": a.does_support} for a in assocs]
+    return politician_out(politician, bills_out)
+
 @router.post("/", response_model=PoliticianOut, status_code=status.HTTP_201_CREATED)
 def create_politician(
     data: PoliticianCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin_user)
+    current_user: Principal = Depends(require_admin_user)
 ):
     politician = Politician(
         name=data.name,
@@ -86,24 +94,63 @@ def create_politician(
 
     return politician_to_out(db, politician)
 
+POLITICIAN_COLUMNS = {
+    name: getattr(Politician, name)
+    for name in (
+        "id", "name", "title", "office_address_line1", "office_address_line2", "office_city",
+        "office_state", "office_zip", "legislative_body", "email", "created_at", "updated_at"
+    )
+}
+
+async def bills_by_politician(db: AsyncSession, politician_ids: List[UUID]) -> dict:
+    # One IN query for the associations of every listed politician
+    result = await db.execute(select(BillPolitician).where(BillPolitician.politician_id.in_(politician_ids)))
+    by_politician = defaultdict(list)
+    for a in result.scalars():
+        by_politician[a.politician_id].append({"bill_id": a.bill_id, "does_support": a.does_support})
+    return by_politician
+
+async def list_politicians_projected(db: AsyncSession, fields: List[str]) -> List[dict]:
+    with_bills = "bills" in fields
+    rows = await select_fields_async(db, select(Politician), POLITICIAN_COLUMNS, fields + ["id"] if with_bills else fields)
+    if with_bills:
+        by_politician = await bills_by_politician(db, [r["id"] for r in rows])
+        for r in rows:
+            r["bills"] = by_politician[r["id"]]
+            if "id" not in fields:
+                del r["id"]
+    return rows
+
 @router.get("/", response_model=List[PoliticianOut])
-def list_politicians(db: Session = Depends(get_db)):
-    politicians = db.query(Politician).all()
-    return [politician_to_out(db, p) for p in politicians]
+async def list_politicians(
+    fields: Optional[str] = Query(None, description="Comma-separated PoliticianOut fields to return"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        requested = parse_fields(fields, PoliticianOut.model_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if requested:
+        return JSONResponse(content=jsonable_encoder(await list_politicians_projected(db, requested)))
+
+    politicians = (await db.execute(select(Politician))).scalars().all()
+    by_politician = await bills_by_politician(db, [p.id for p in politicians])
+    return [politician_out(p, by_politician[p.id]) for p in politicians]
 
 @router.get("/{politician_id}", response_model=PoliticianOut)
-def get_politician(politician_id: UUID, db: Session = Depends(get_db)):
-    politician = db.query(Politician).filter(Politician.id == politician_id).first()
+async def get_politician(politician_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
+    politician = await db.get(Politician, politician_id)
     if not politician:
         raise HTTPException(status_code=404, detail="Politician not found")
-    return politician_to_out(db, politician)
+    by_politician = await bills_by_politician(db, [politician.id])
+    return politician_out(politician, by_politician[politician.id])
 
 @router.patch("/{politician_id}", response_model=PoliticianOut)
 def update_politician(
     politician_id: UUID,
     updates: PoliticianUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin_user)
+    current_user: Principal = Depends(require_admin_user)
 ):
     politician = db.query(Politician).filter(Politician.id == politician_id).first()
     if not politician:
@@ -141,7 +188,7 @@ def update_politician(
 def delete_politician(
     politician_id: UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin_user)
+    current_user: Principal = Depends(require_admin_user)
 ):
     politician = db.query(Politician).filter(Politician.id == politician_id).first()
     if not politician:
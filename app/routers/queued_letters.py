@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 from app.core.database import get_db
-from app.models.queued_letter import QueuedLetter
+from app.models.queued_letter import QueuedLetter, QueuedLetterStatus as ModelQueuedLetterStatus
 from app.models.user_letter_request import UserLetterRequest
-from app.models.user import User
-from app.schemas.queued_letter import QueuedLetterCreate, QueuedLetterUpdate, QueuedLetterOut
-from app.dependencies import require_verified_user
+from app.services.principal_cache import Principal
+from app.schemas.queued_letter import (
+    QueuedLetterCreate, QueuedLetterUpdate, QueuedLetterOut, QueuedLetterStatus, OfficeBatchOut, PrintBatchOut,
+    QueuedLetterBulkStatusUpdate
+)
+from app.schemas.bulk_status import BulkStatusResult
+from app.services.bulk_status import MAX_BULK_IDS, bulk_transition_queued_letters
+from app.services import print_queue
+from app.services.pagination import keyset_page_async
+from app.dependencies import require_verified_user, require_verified_user_async, require_admin_user, get_async_read_db
+from app.services.render_context import load_render_context_for_queued_letter
+from app.services.printing_service import html_to_pdf, print_pdf
 
 router = APIRouter(prefix="/queued-letters", tags=["queued_letters"])
 
-def is_admin(current_user: User) -> bool:
+def is_admin(current_user: Principal) -> bool:
     return current_user.role == "administrator"
 
-def get_queued_letter_or_404(db: Session, queued_letter_id: UUID, current_user: User) -> QueuedLetter:
+def get_queued_letter_or_404(db: Session, queued_letter_id: UUID, current_user: Principal) -> QueuedLetter:
     queued_letter = db.query(QueuedLetter).filter(QueuedLetter.id == queued_letter_id).first()
     if not queued_letter:
         raise HTTPException(status_code=404, detail="Queued letter not found")
@@ -34,7 +46,7 @@ def get_queued_letter_or_404(db: Session, queued_letter_id: UUID, current_user:
 def create_queued_letter(
     payload: QueuedLetterCreate, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     # Validate that the user_letter_request exists and belongs to current_user (or admin)
     user_letter_req = db.query(UserLetterRequest).filter(UserLetterRequest.id == payload.user_letter_request_id).first()
@@ -44,9 +56,15 @@ def create_queued_letter(
     if not is_admin(current_user) and user_letter_req.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    if payload.priority and not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Only administrators can set queue priority")
+
     queued_letter = QueuedLetter(
-        user_letter_request_id=payload.user_letter_request_id
+        user_letter_request_id=payload.user_letter_request_id,
+        priority=payload.priority
     )
+    if payload.scheduled_for is not None:
+        queued_letter.scheduled_for = payload.scheduled_for
     db.add(queued_letter)
     db.commit()
     db.refresh(queued_letter)
@@ -54,28 +72,126 @@ def create_queued_letter(
     return queued_letter_out_from_model(queued_letter)
 
 @router.get("/", response_model=List[QueuedLetterOut])
-def list_queued_letters(
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(require_verified_user)
+async def list_queued_letters(
+    response: Response,
+    status: Optional[QueuedLetterStatus] = None,
+    bill_id: Optional[UUID] = None,
+    politician_id: Optional[UUID] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(require_verified_user_async)
 ):
-    if is_admin(current_user):
-        ql_list = db.query(QueuedLetter).all()
-    else:
-        # Filter by user's own queued letters
-        ql_list = (
-            db.query(QueuedLetter)
-              .join(UserLetterRequest, QueuedLetter.user_letter_request_id == UserLetterRequest.id)
-              .filter(UserLetterRequest.user_id == current_user.id)
-              .all()
+    # One joined query reads bill_id and politician_id alongside each queued letter
+    query = (
+        select(
+            QueuedLetter.id,
+            QueuedLetter.user_letter_request_id,
+            QueuedLetter.status,
+            QueuedLetter.priority,
+            QueuedLetter.scheduled_for,
+            QueuedLetter.created_at,
+            UserLetterRequest.bill_id,
+            UserLetterRequest.politician_id
         )
+        .join(UserLetterRequest, QueuedLetter.user_letter_request_id == UserLetterRequest.id)
+    )
+    if not is_admin(current_user):
+        # Filter by user's own queued letters
+        query = query.filter(UserLetterRequest.user_id == current_user.id)
+    if status is not None:
+        query = query.filter(QueuedLetter.status == status.value)
+    if bill_id is not None:
+        query = query.filter(UserLetterRequest.bill_id == bill_id)
+    if politician_id is not None:
+        query = query.filter(UserLetterRequest.politician_id == politician_id)
+    if created_after is not None:
+        query = query.filter(QueuedLetter.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(QueuedLetter.created_at < created_before)
+
+    try:
+        rows, next_cursor = await keyset_page_async(db, query, QueuedLetter.created_at, QueuedLetter.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return [queued_letter_out_from_model(ql) for ql in ql_list]
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [QueuedLetterOut.model_validate(row) for row in rows]
+
+@router.post("/claim", response_model=PrintBatchOut)
+def claim_print_batch(
+    batch_size: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_verified_user)
+):
+    """
+    Claim the next due letters to print, highest priority first, grouped by legislative office address.
+    Mark each letter processed once printed; unprocessed claims are released after PRINT_QUEUE_CLAIM_LEASE_SECONDS.
+    """
+    # Only admins can print
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    offices = print_queue.claim_print_batch(db, batch_size)
+    return PrintBatchOut(
+        claimed=sum(len(office.letters) for office in offices),
+        offices=[OfficeBatchOut.model_validate(office) for office in offices]
+    )
+
+@router.post("/bulk-status", response_model=BulkStatusResult)
+def bulk_update_queued_letter_status(
+    payload: QueuedLetterBulkStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin_user)
+):
+    """
+    Move every queued letter in ids, or matching filter, to status with a single UPDATE.
+    Requeued letters drop any print claim.
+    """
+    if (payload.ids is None) == (payload.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter.")
+
+    if payload.ids is not None:
+        if len(payload.ids) > MAX_BULK_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_IDS} ids per request; use a filter instead.")
+        conditions = [QueuedLetter.id.in_(payload.ids)]
+    else:
+        filters = payload.filter.dict(exclude_none=True)
+        if not filters:
+            raise HTTPException(status_code=400, detail="Filter must not be empty.")
+        conditions = []
+        if "status" in filters:
+            conditions.append(QueuedLetter.status == ModelQueuedLetterStatus(filters["status"].value))
+        letter_conditions = [
+            getattr(UserLetterRequest, name) == filters[name]
+            for name in ("bill_id", "politician_id") if name in filters
+        ]
+        if letter_conditions:
+            conditions.append(QueuedLetter.user_letter_request_id.in_(
+                select(UserLetterRequest.id).where(*letter_conditions)
+            ))
+        if "created_after" in filters:
+            conditions.append(QueuedLetter.created_at >= filters["created_after"])
+        if "created_before" in filters:
+            conditions.append(QueuedLetter.created_at < filters["created_before"])
+
+    updated_from = bulk_transition_queued_letters(db, ModelQueuedLetterStatus(payload.status.value), conditions)
+    updated = sum(updated_from.values())
+    return BulkStatusResult(
+        status=payload.status.value,
+        updated=updated,
+        updated_from=updated_from,
+        skipped=len(set(payload.ids)) - updated if payload.ids is not None else None
+    )
 
 @router.get("/{queued_letter_id}", response_model=QueuedLetterOut)
 def get_queued_letter(
     queued_letter_id: UUID, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     queued_letter = get_queued_letter_or_404(db, queued_letter_id, current_user)
     return queued_letter_out_from_model(queued_letter)
@@ -85,11 +201,13 @@ def update_queued_letter(
     queued_letter_id: UUID,
     updates: QueuedLetterUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     queued_letter = get_queued_letter_or_404(db, queued_letter_id, current_user)
 
     update_data = updates.dict(exclude_unset=True)
+    if "priority" in update_data and not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Only administrators can set queue priority")
     for field, value in update_data.items():
         setattr(queued_letter, field, value)
 
@@ -101,7 +219,7 @@ def update_queued_letter(
 def delete_queued_letter(
     queued_letter_id: UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     queued_letter = get_queued_letter_or_404(db, queued_letter_id, current_user)
     db.delete(queued_letter)
@@ -111,7 +229,7 @@ def delete_queued_letter(
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
 def clear_queue(
     db: Session = Depends(get_db), 
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     if is_admin(current_user):
         # Admin clears entire queue
@@ -130,56 +248,27 @@ def print_queued_letter(
     queued_letter_id: UUID, 
     printer_name: str = Query(...), 
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     # Only admins can print
     if not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    queued_letter = db.query(QueuedLetter).filter(QueuedLetter.id == queued_letter_id).first()
-    if not queued_letter:
+    ctx = load_render_context_for_queued_letter(db, queued_letter_id)
+    if not ctx:
         raise HTTPException(status_code=404, detail="Queued letter not found")
 
-    # Retrieve the final letter text from the user_letter_request
-    user_letter_req = queued_letter.user_letter_request
-    if not user_letter_req or not user_letter_req.final_letter_text:
+    if not ctx.final_letter_text:
         raise HTTPException(status_code=400, detail="No final letter text available for this queued letter.")
 
-    # Parse the final_letter_text
-    import json
-    try:
-        letter_data = json.loads(user_letter_req.final_letter_text)
-        letter_text = letter_data.get("letter", "")
-    except (json.JSONDecodeError, TypeError):
-        raise HTTPException(status_code=400, detail="Invalid JSON in final_letter_text.")
-
-    politician = user_letter_req.politician
-    recipient_address = {
-        "line1": politician.office_address_line1,
-        "line2": politician.office_address_line2 or "",
-        "city": politician.office_city,
-        "state": politician.office_state,
-        "zip": politician.office_zip
-    }
-
-    # Get global return address or default if none
-    from app.models.global_return_address import GlobalReturnAddress
-    global_addr = db.query(GlobalReturnAddress).first()
-    if not global_addr:
+    if not ctx.has_return_address:
         raise HTTPException(status_code=500, detail="No global return address set.")
 
-    sender_name = global_addr.organization_name
-    sender_address = {
-        "line1": global_addr.address_line1,
-        "city": global_addr.city,
-        "state": global_addr.state,
-        "zip": global_addr.zipcode
-    }
-
-    from app.services.mailing_service import format_letter_text
-    from app.services.printing_service import html_to_pdf, print_pdf
+    try:
+        html = ctx.render_html()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    html = format_letter_text(letter_text, politician.name, recipient_address, sender_name, sender_address)
     pdf = html_to_pdf(html)
 
     try:
@@ -196,6 +285,8 @@ def queued_letter_out_from_model(queued_letter: QueuedLetter) -> QueuedLetterOut
         id=queued_letter.id,
         user_letter_request_id=queued_letter.user_letter_request_id,
         status=queued_letter.status,
+        priority=queued_letter.priority,
+        scheduled_for=queued_letter.scheduled_for,
         created_at=queued_letter.created_at,
         bill_id=ulr.bill_id,
         politician_id=ulr.politician_id
@@ -1,30 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
-import json
+from typing import Optional
 import requests
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.models.user_letter_request import UserLetterRequest, LetterStatus
 from app.models.bill import Bill
 from app.models.politician import Politician
-from app.schemas.letter_request import UserLetterRequestCreate, UserLetterRequestOut, UserLetterRequestUpdate
+from app.schemas.letter_request import (
+    UserLetterRequestCreate, UserLetterRequestOut, UserLetterRequestUpdate, LetterCartCheckout, LetterBulkStatusUpdate
+)
+from app.schemas.bulk_status import BulkStatusResult
 from app.schemas.letter_draft_request import LetterDraftRequest
 from app.services.letter_drafting import draft_letter
-from app.services.payment_service import create_checkout_session
-from app.models.mailing_transaction import MailingTransaction, MailingStatus
-from app.services.mailing_service import format_letter_text, send_letter
-from app.dependencies import require_verified_user
-from app.models.user import User
-from app.models.global_return_address import GlobalReturnAddress
+from app.services.payment_service import (
+    LETTER_PRICE_CENTS, MAX_CART_LETTERS, cart_checkout_blocker, create_cart_checkout_url,
+    get_or_create_checkout_url, shared_checkout_url
+)
+from app.services import mailing_service
+from app.services.bulk_status import MAX_BULK_IDS, bulk_transition_letters
+from app.services.projection import parse_fields, select_fields_async
+from app.services.render_context import LetterRenderContext, load_render_context
+from app.dependencies import (
+    require_verified_user, require_verified_user_async, require_admin_user, get_read_db, get_async_read_db
+)
+from app.services.principal_cache import Principal
 from app.services.printing_service import html_to_pdf
 
 router = APIRouter(prefix="/letter-requests", tags=["letter_requests"])
 
-def is_admin(current_user: User) -> bool:
+def is_admin(current_user: Principal) -> bool:
     return current_user.role == "administrator"
 
-def get_letter_request_or_404(db: Session, letter_id: UUID, current_user: User) -> UserLetterRequest:
+def get_letter_request_or_404(db: Session, letter_id: UUID, current_user: Principal) -> UserLetterRequest:
     letter_req = db.query(UserLetterRequest).filter(UserLetterRequest.id == letter_id).first()
     if not letter_req:
         raise HTTPException(status_code=404, detail="Letter request not found")
@@ -35,11 +49,22 @@ def get_letter_request_or_404(db: Session, letter_id: UUID, current_user: User)
 
     return letter_req
 
+def get_render_context_or_404(db: Session, letter_id: UUID, current_user: Principal) -> LetterRenderContext:
+    ctx = load_render_context(db, letter_id)
+    if not ctx:
+        raise HTTPException(status_code=404, detail="Letter request not found")
+
+    # Check ownership unless admin
+    if not is_admin(current_user) and ctx.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this letter request")
+
+    return ctx
+
 @router.post("/", response_model=UserLetterRequestOut, status_code=status.HTTP_201_CREATED)
 def create_letter_request(
     letter_data: UserLetterRequestCreate, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     # Validate that the Bill and Politician exist
     bill = db.query(Bill).filter(Bill.id == letter_data.bill_id).first()
@@ -64,19 +89,75 @@ def create_letter_request(
     return letter_req
 
 @router.get("/", response_model=list[UserLetterRequestOut])
-def list_letter_requests(db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
-    if is_admin(current_user):
-        return db.query(UserLetterRequest).all()
+async def list_letter_requests(
+    fields: Optional[str] = Query(None, description="Comma-separated UserLetterRequestOut fields to return"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(require_verified_user_async)
+):
+    try:
+        requested = parse_fields(fields, UserLetterRequestOut.model_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    stmt = select(UserLetterRequest)
+    if not is_admin(current_user):
+        stmt = stmt.where(UserLetterRequest.user_id == current_user.id)
+
+    if requested:
+        # Skips final_letter_text and other unrequested columns entirely
+        columns = {name: getattr(UserLetterRequest, name) for name in UserLetterRequestOut.model_fields}
+        return JSONResponse(content=jsonable_encoder(await select_fields_async(db, stmt, columns, requested)))
+
+    return (await db.execute(stmt)).scalars().all()
+
+@router.post("/bulk-status", response_model=BulkStatusResult)
+def bulk_update_letter_status(
+    payload: LetterBulkStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin_user)
+):
+    """
+    Move every letter in ids, or matching filter, to status with a single UPDATE.
+    Letters whose current status can't move to the target status are skipped.
+    """
+    if (payload.ids is None) == (payload.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter.")
+
+    if payload.ids is not None:
+        if len(payload.ids) > MAX_BULK_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_IDS} ids per request; use a filter instead.")
+        conditions = [UserLetterRequest.id.in_(payload.ids)]
     else:
-        return db.query(UserLetterRequest).filter(UserLetterRequest.user_id == current_user.id).all()
+        filters = payload.filter.dict(exclude_none=True)
+        if not filters:
+            raise HTTPException(status_code=400, detail="Filter must not be empty.")
+        conditions = []
+        if "status" in filters:
+            conditions.append(UserLetterRequest.status == LetterStatus(filters["status"].value))
+        for name in ("bill_id", "politician_id", "user_id"):
+            if name in filters:
+                conditions.append(getattr(UserLetterRequest, name) == filters[name])
+        if "created_after" in filters:
+            conditions.append(UserLetterRequest.created_at >= filters["created_after"])
+        if "created_before" in filters:
+            conditions.append(UserLetterRequest.created_at < filters["created_before"])
+
+    updated_from = bulk_transition_letters(db, LetterStatus(payload.status.value), conditions)
+    updated = sum(updated_from.values())
+    return BulkStatusResult(
+        status=payload.status.value,
+        updated=updated,
+        updated_from=updated_from,
+        skipped=len(set(payload.ids)) - updated if payload.ids is not None else None
+    )
 
 @router.get("/{letter_id}", response_model=UserLetterRequestOut)
-def get_letter_request(letter_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
+def get_letter_request(letter_id: UUID, db: Session = Depends(get_read_db), current_user: Principal = Depends(require_verified_user)):
     letter_req = get_letter_request_or_404(db, letter_id, current_user)
     return letter_req
 
 @router.patch("/{letter_id}", response_model=UserLetterRequestOut)
-def update_letter_request(letter_id: UUID, updates: UserLetterRequestUpdate, db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
+def update_letter_request(letter_id: UUID, updates: UserLetterRequestUpdate, db: Session = Depends(get_db), current_user: Principal = Depends(require_verified_user)):
     letter_req = get_letter_request_or_404(db, letter_id, current_user)
 
     update_data = updates.dict(exclude_unset=True)
@@ -88,7 +169,7 @@ def update_letter_request(letter_id: UUID, updates: UserLetterRequestUpdate, db:
     return letter_req
 
 @router.delete("/{letter_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_letter_request(letter_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
+def delete_letter_request(letter_id: UUID, db: Session = Depends(get_db), current_user: Principal = Depends(require_verified_user)):
     letter_req = get_letter_request_or_404(db, letter_id, current_user)
 
     # Allow deletion only if not mailed yet
@@ -104,7 +185,7 @@ def generate_letter_draft(
     letter_id: UUID, 
     draft_data: LetterDraftRequest, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(require_verified_user)
+    current_user: Principal = Depends(require_verified_user)
 ):
     letter_req = get_letter_request_or_404(db, letter_id, current_user)
 
@@ -120,145 +201,153 @@ def generate_letter_draft(
     return letter_req
 
 @router.post("/{letter_id}/pay")
-def pay_for_letter(letter_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
+def pay_for_letter(letter_id: UUID, db: Session = Depends(get_db), current_user: Principal = Depends(require_verified_user)):
     letter_req = get_letter_request_or_404(db, letter_id, current_user)
+    # Lock the row so double clicks wait for, and then reuse, the first request's session
+    db.refresh(letter_req, with_for_update=True)
 
     # Ensure letter is finalized before payment
     if letter_req.status != LetterStatus.finalized:
         raise HTTPException(status_code=400, detail="Letter must be finalized before paying.")
 
-    amount = 500  # e.g. $5.00
     success_url = f"http://localhost:8000/payment-success?letter_id={letter_id}"
     cancel_url = f"http://localhost:8000/payment-cancel?letter_id={letter_id}"
 
-    session = create_checkout_session(str(letter_id), amount, success_url, cancel_url)
-    return {"checkout_url": session.url}
+    checkout_url = get_or_create_checkout_url(db, letter_req, LETTER_PRICE_CENTS, success_url, cancel_url)
+    return {"checkout_url": checkout_url}
+
+@router.post("/checkout")
+def checkout_letters(payload: LetterCartCheckout, db: Session = Depends(get_db), current_user: Principal = Depends(require_verified_user)):
+    """
+    Pay for several finalized letters with a single Stripe Checkout session.
+    """
+    letter_ids = list(dict.fromkeys(payload.letter_request_ids))
+    if not letter_ids:
+        raise HTTPException(status_code=400, detail="No letter requests given.")
+    if len(letter_ids) > MAX_CART_LETTERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CART_LETTERS} letters can be paid for at once.")
+
+    # Lock the letters, in id order so overlapping carts can't deadlock, while the session is created
+    rows = (
+        db.query(UserLetterRequest, Politician.name)
+        .join(Politician, UserLetterRequest.politician_id == Politician.id)
+        .filter(UserLetterRequest.id.in_(letter_ids))
+        .order_by(UserLetterRequest.id)
+        .with_for_update(of=UserLetterRequest)
+        .all()
+    )
+    if len(rows) != len(letter_ids):
+        raise HTTPException(status_code=404, detail="Letter request not found")
 
-@router.post("/{letter_id}/mail")
-def mail_letter(letter_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
-    letter_req = get_letter_request_or_404(db, letter_id, current_user)
+    for letter_req, _ in rows:
+        if not is_admin(current_user) and letter_req.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to access this letter request")
+        if letter_req.status != LetterStatus.finalized:
+            raise HTTPException(status_code=400, detail=f"Letter {letter_req.id} must be finalized before paying.")
 
-    if letter_req.status != LetterStatus.paid:
+    letter_reqs = [letter_req for letter_req, _ in rows]
+    checkout_url = shared_checkout_url(db, letter_reqs)
+    if checkout_url:
+        return {"checkout_url": checkout_url}
+    blocker = cart_checkout_blocker(letter_reqs)
+    if blocker:
+        raise HTTPException(status_code=409, detail=blocker)
+
+    success_url = "http://localhost:8000/payment-success?session_id={CHECKOUT_SESSION_ID}"
+    cancel_url = "http://localhost:8000/payment-cancel?session_id={CHECKOUT_SESSION_ID}"
+
+    checkout_url = create_cart_checkout_url(db, rows, LETTER_PRICE_CENTS, success_url, cancel_url)
+    return {"checkout_url": checkout_url}
+
+def check_mailable(ctx: LetterRenderContext):
+    if ctx.status != LetterStatus.paid:
         raise HTTPException(status_code=400, detail="Letter must be paid before mailing.")
 
-    if not letter_req.final_letter_text:
+    if not ctx.final_letter_text:
         raise HTTPException(status_code=400, detail="No final letter text available.")
 
-    global_addr = db.query(GlobalReturnAddress).first()
-    if not global_addr:
+    if not ctx.has_return_address:
         raise HTTPException(status_code=500, detail="No global return address set.")
 
     try:
-        letter_data = json.loads(letter_req.final_letter_text)
-        raw_letter_text = letter_data.get("letter")
-        if not raw_letter_text:
-            raise HTTPException(status_code=400, detail="No 'letter' field found in final_letter_text.")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid JSON in final_letter_text.")
-
-    politician = letter_req.politician
-    recipient_address = {
-        "line1": politician.office_address_line1,
-        "line2": politician.office_address_line2 or "",
-        "city": politician.office_city,
-        "state": politician.office_state,
-        "zip": politician.office_zip
-    }
-
-    sender_name = global_addr.organization_name
-    sender_address = {
-        "line1": global_addr.address_line1,
-        "line2": global_addr.address_line2 or "",
-        "city": global_addr.city,
-        "state": global_addr.state,
-        "zip": global_addr.zipcode
-    }
-
-    formatted_html = format_letter_text(
-        raw_letter_text,
-        recipient_name=politician.name,
-        recipient_address=recipient_address,
-        sender_name=sender_name,
-        sender_address=sender_address
-    )
+        ctx.letter_text()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def mail_or_dispatch(ctx: LetterRenderContext, db: Session):
+    # The mailing dispatcher picks up paid letters in the background, unless something holds it back.
+    # Mailing directly is held back the same way, so an unresolved attempt is never resent blindly.
+    blocker = mailing_service.dispatch_blocker(db, ctx.letter_request_id)
+    if blocker:
+        raise HTTPException(status_code=409, detail=blocker)
+    if settings.MAILING_DISPATCHER_ENABLED:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"message": "Letter queued for mailing", "letter_request_id": str(ctx.letter_request_id)}
+        )
 
     try:
-        mail_response = send_letter(
-            formatted_html=formatted_html,
-            recipient_name=politician.name,
-            recipient_address=recipient_address,
-            sender_name=sender_name,
-            sender_address=sender_address
-        )
-    except requests.HTTPError as e:
-        mailing_tx = MailingTransaction(
-            user_letter_request_id=letter_req.id,
-            external_mail_service_id=None,
-            status=MailingStatus.failed,
-            error_message=str(e),
-            mail_service_response=None
-        )
-        db.add(mailing_tx)
-        db.commit()
+        mailing_tx, mail_response = mailing_service.mail_letter(ctx, db)
+    except requests.RequestException:
         raise HTTPException(status_code=500, detail="Failed to send letter")
 
-    mailing_tx = MailingTransaction(
-        user_letter_request_id=letter_req.id,
-        external_mail_service_id=mail_response.get("id"),
-        status=MailingStatus.sent,
-        mail_service_response=mail_response
-    )
-    db.add(mailing_tx)
-    letter_req.status = LetterStatus.mailed
-    db.commit()
-    db.refresh(letter_req)
-
     return {"message": "Letter mailed successfully", "mailing_transaction_id": str(mailing_tx.id), "mail_service_response": mail_response}
 
+@router.post("/{letter_id}/mail")
+def mail_letter(letter_id: UUID, db: Session = Depends(get_db), current_user: Principal = Depends(require_verified_user)):
+    ctx = get_render_context_or_404(db, letter_id, current_user)
+    check_mailable(ctx)
+    return mail_or_dispatch(ctx, db)
+
+@router.post("/{letter_id}/mail/retry")
+def retry_mail_letter(letter_id: UUID, db: Session = Depends(get_db), current_user: Principal = Depends(require_admin_user)):
+    """
+    Resolve a letter's failed or unconfirmed mailing attempts. Lob is asked first: if it has a letter
+    for this request, the newest attempt is recorded as sent. Otherwise the attempts are set aside and
+    the letter is mailed again (through the dispatcher when it is enabled). Failures usually need a
+    look first, e.g. at the recipient address, so only administrators can retry.
+    """
+    ctx = get_render_context_or_404(db, letter_id, current_user)
+    check_mailable(ctx)
+
+    attempts = mailing_service.unresolved_attempts(db, letter_id)
+    if not attempts:
+        raise HTTPException(status_code=409, detail="Letter has no failed mailing attempt to retry.")
+
+    # Lob forgets idempotency keys after about a day, so only its own records make a resend safe
+    try:
+        lob_letter = mailing_service.find_lob_letter(letter_id)
+    except requests.RequestException:
+        raise HTTPException(status_code=502, detail="Could not check with Lob whether the letter was already mailed.")
+
+    if lob_letter:
+        mailing_service.record_sent(db, attempts[0], lob_letter)
+        mailing_service.mark_attempts_retried(db, attempts[1:])
+        db.commit()
+        return {
+            "message": "Lob had already accepted the letter; no new letter was sent",
+            "mailing_transaction_id": str(attempts[0].id),
+            "mail_service_response": lob_letter
+        }
+
+    mailing_service.mark_attempts_retried(db, attempts)
+    db.commit()
+    return mail_or_dispatch(ctx, db)
+
 @router.get("/{letter_id}/pdf", response_class=Response)
-def get_letter_pdf(letter_id: UUID, db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
-    letter_req = get_letter_request_or_404(db, letter_id, current_user)
+def get_letter_pdf(letter_id: UUID, db: Session = Depends(get_db), current_user: Principal = Depends(require_verified_user)):
+    ctx = get_render_context_or_404(db, letter_id, current_user)
 
-    if not letter_req.final_letter_text:
+    if not ctx.final_letter_text:
         raise HTTPException(status_code=400, detail="No final letter text available.")
 
-    global_addr = db.query(GlobalReturnAddress).first()
-    if not global_addr:
+    if not ctx.has_return_address:
         raise HTTPException(status_code=500, detail="No global return address set.")
 
     try:
-        letter_data = json.loads(letter_req.final_letter_text)
-        raw_letter_text = letter_data.get("letter")
-        if not raw_letter_text or not isinstance(raw_letter_text, str):
-            raise HTTPException(status_code=400, detail="No 'letter' field found in final_letter_text.")
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid JSON in final_letter_text.")
-
-    politician = letter_req.politician
-    recipient_address = {
-        "line1": politician.office_address_line1,
-        "line2": politician.office_address_line2 or "",
-        "city": politician.office_city,
-        "state": politician.office_state,
-        "zip": politician.office_zip
-    }
-
-    sender_name = global_addr.organization_name
-    sender_address = {
-        "line1": global_addr.address_line1,
-        "line2": global_addr.address_line2 or "",
-        "city": global_addr.city,
-        "state": global_addr.state,
-        "zip": global_addr.zipcode
-    }
-
-    formatted_html = format_letter_text(
-        raw_letter_text,
-        recipient_name=politician.name,
-        recipient_address=recipient_address,
-        sender_name=sender_name,
-        sender_address=sender_address
-    )
+        formatted_html = ctx.render_html()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     pdf = html_to_pdf(formatted_html)
     return Response(content=pdf, media_type="application/pdf")
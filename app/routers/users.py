@@ -1,10 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Body, UploadFile, File, Header, Response
 from sqlalchemy.orm import Session
 from datetime import timedelta
-from typing import List, Dict, Any, Union
-import base64
-from io import BytesIO
-from PIL import Image
+from typing import List, Dict, Any, Optional, Union
+from uuid import UUID
 
 from app.core.database import get_db
 from app.schemas.user import (
@@ -12,16 +10,28 @@ from app.schemas.user import (
     PasswordResetRequest, PasswordResetConfirm, UserProfile, UserProfileUpdate
 )
 from app.models.user import User
-from app.services.security import hash_password, verify_password
+from app.services.security import hash_password, verify_password, verify_and_update_password
 from app.services.jwt_service import create_access_token
-from app.dependencies import require_verified_user
-from app.services.otp_service import create_otp_code, verify_otp_code, send_email
+from app.dependencies import require_verified_user, load_verified_user
+from app.services.principal_cache import Principal, invalidate_principal
+from app.services.otp_service import create_otp_code, verify_otp_code
+from app.services.email_service import enqueue_email
+from app.services.projection import select_fields
+from app.services.image_processing import ImageTooLarge, read_upload, process_profile_photo
+from app.services.user_photos import PHOTO, THUMBNAIL, save_user_photos, delete_user_photos, get_photo_etag, get_photo
 from app.core.config import settings
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+PHOTO_URL_FIELDS = {"profile_photo_url": PHOTO, "thumbnail_photo_url": THUMBNAIL}
+
+def photo_url(user_id, kind: str, photo_etag: Optional[str]) -> Optional[str]:
+    if photo_etag is None:
+        return None
+    # The etag in the query string changes whenever the photo does, so clients can cache by URL
+    return f"/users/{user_id}/{kind}?v={photo_etag}"
+
 def user_to_userout(user: User) -> UserOut:
-    # Convert binary images to base64 if present
     user_dict = {
         "email": user.email,
         "id": user.id,
@@ -56,15 +66,8 @@ def user_to_userout(user: User) -> UserOut:
         "preferred_language": user.preferred_language
     }
 
-    if user.profile_photo is not None:
-        user_dict["profile_photo"] = base64.b64encode(user.profile_photo).decode('utf-8')
-    else:
-        user_dict["profile_photo"] = None
-
-    if user.thumbnail_photo is not None:
-        user_dict["thumbnail_photo"] = base64.b64encode(user.thumbnail_photo).decode('utf-8')
-    else:
-        user_dict["thumbnail_photo"] = None
+    for field, kind in PHOTO_URL_FIELDS.items():
+        user_dict[field] = photo_url(user.id, kind, user.photo_etag)
 
     return UserOut(**user_dict)
 
@@ -85,7 +88,7 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
     db.refresh(user)
 
     code = create_otp_code(db, user.id, "verify_email", 30)
-    send_email(user.email, "Verify your account", f"Your OTP code is: {code}")
+    enqueue_email(db, user.email, "Verify your account", f"Your OTP code is: {code}")
 
     return user_to_userout(user)
 
@@ -96,15 +99,24 @@ def verify_email(data: VerifyEmailRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid or expired code")
     user.is_verified = True
     db.commit()
-    db.refresh(user)
+    invalidate_principal(user.id)
     return {"message": "Email verified"}
 
 @router.post("/login", response_model=Token)
 def login(user_in: UserLogin, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == user_in.email).first()
-    if not user or not verify_password(user_in.password, user.password_hash):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+
+    valid, new_hash = verify_and_update_password(user_in.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    if new_hash:
+        # Stored hash used an outdated work factor
+        user.password_hash = new_hash
+        db.commit()
+
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Email not verified")
 
@@ -116,10 +128,12 @@ def login(user_in: UserLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/logout")
-def logout(current_user: User = Depends(require_verified_user), db: Session = Depends(get_db)):
-    current_user.token_version += 1
+def logout(current_user: Principal = Depends(require_verified_user), db: Session = Depends(get_db)):
+    db.query(User).filter(User.id == current_user.id).update(
+        {User.token_version: User.token_version + 1}, synchronize_session=False
+    )
     db.commit()
-    db.refresh(current_user)
+    invalidate_principal(current_user.id)
     return {"message": "Logged out"}
 
 @router.post("/request-password-reset")
@@ -128,7 +142,7 @@ def request_password_reset(data: PasswordResetRequest, db: Session = Depends(get
     if not user:
         raise HTTPException(status_code=404, detail="No user with that email")
     code = create_otp_code(db, user.id, "reset_password", 30)
-    send_email(user.email, "Reset your password", f"Your reset code is: {code}")
+    enqueue_email(db, user.email, "Reset your password", f"Your reset code is: {code}")
     return {"message": "Check your email for a reset code"}
 
 @router.post("/reset-password")
@@ -138,80 +152,135 @@ def reset_password(data: PasswordResetConfirm, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid or expired code")
     user.password_hash = hash_password(data.new_password)
     db.commit()
-    db.refresh(user)
+    invalidate_principal(user.id)
     return {"message": "Password updated"}
 
 @router.get("/me", response_model=UserOut)
-def get_me(current_user: User = Depends(require_verified_user)):
+def get_me(current_user: User = Depends(load_verified_user)):
     return user_to_userout(current_user)
 
 @router.post("/me/query")
-def query_me(fields: Dict[str, Any] = Body(...), current_user: User = Depends(require_verified_user)):
+def query_me(fields: Dict[str, Any] = Body(...), db: Session = Depends(get_db), current_user: Principal = Depends(require_verified_user)):
     if "fields" not in fields or not isinstance(fields["fields"], list):
         raise HTTPException(status_code=400, detail="Invalid request format")
 
-    userout = user_to_userout(current_user)
-    requested_fields = fields["fields"]
+    # Unknown field names are ignored; only the requested columns are selected
+    requested_fields = [f for f in dict.fromkeys(fields["fields"]) if f in UserOut.model_fields]
+    photo_fields = [f for f in requested_fields if f in PHOTO_URL_FIELDS]
+    column_fields = [f for f in requested_fields if f not in PHOTO_URL_FIELDS]
+    if photo_fields:
+        column_fields += ["photo_etag"]
+    if not column_fields:
+        return {}
+
+    rows = select_fields(
+        db.query(User).filter(User.id == current_user.id),
+        {name: getattr(User, name) for name in column_fields},
+        column_fields
+    )
+    if not rows:
+        raise HTTPException(status_code=401, detail="Invalid user")
+    row = rows[0]
+
     response = {}
-    userout_dict = userout.dict()
     for field in requested_fields:
-        if field in userout_dict:
-            response[field] = userout_dict[field]
-
+        if field in PHOTO_URL_FIELDS:
+            response[field] = photo_url(current_user.id, PHOTO_URL_FIELDS[field], row["photo_etag"])
+        else:
+            response[field] = row[field]
     return response
 
 @router.post("/me/profile", response_model=UserOut)
-def create_or_replace_profile(profile_data: UserProfile, db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
+def create_or_replace_profile(profile_data: UserProfile, db: Session = Depends(get_db), current_user: User = Depends(load_verified_user)):
     update_user_profile_fields(profile_data, current_user)
     current_user.profile_complete = True
     db.commit()
+    invalidate_principal(current_user.id)
     db.refresh(current_user)
     return user_to_userout(current_user)
 
 @router.patch("/me/profile", response_model=UserOut)
-def update_profile(profile_data: UserProfileUpdate, db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
+def update_profile(profile_data: UserProfileUpdate, db: Session = Depends(get_db), current_user: User = Depends(load_verified_user)):
     update_user_profile_fields(profile_data, current_user)
     db.commit()
+    invalidate_principal(current_user.id)
     db.refresh(current_user)
     return user_to_userout(current_user)
 
 @router.delete("/me/profile", status_code=status.HTTP_204_NO_CONTENT)
-def delete_profile(db: Session = Depends(get_db), current_user: User = Depends(require_verified_user)):
+def delete_profile(db: Session = Depends(get_db), current_user: User = Depends(load_verified_user)):
     reset_user_profile_fields(current_user)
+    delete_user_photos(db, current_user)
     current_user.profile_complete = False
     db.commit()
+    invalidate_principal(current_user.id)
     return None
 
 @router.post("/me/profile/photo", response_model=UserOut)
 def upload_profile_photo(
     profile_photo: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: User = Depends(load_verified_user)
 ):
     if profile_photo.content_type not in ["image/png", "image/jpeg", "image/gif"]:
         raise HTTPException(status_code=400, detail="Invalid image format. Accepted: PNG, JPG, GIF.")
 
-    file_bytes = profile_photo.file.read()
     try:
-        img = Image.open(BytesIO(file_bytes))
-    except Exception:
-        raise HTTPException(status_code=400, detail="Could not identify image file.")
+        file_bytes = read_upload(profile_photo.file, settings.PROFILE_PHOTO_MAX_BYTES)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
 
-    img_400 = img.copy().resize((400, 400))
-    output_400 = BytesIO()
-    img_400.save(output_400, format="PNG")
-
-    img_40 = img.copy().resize((40,40))
-    output_40 = BytesIO()
-    img_40.save(output_40, format="PNG")
+    try:
+        processed = process_profile_photo(file_bytes)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    current_user.profile_photo = output_400.getvalue()
-    current_user.thumbnail_photo = output_40.getvalue()
+    save_user_photos(db, current_user, processed.photo, processed.thumbnail, processed.content_type)
     db.commit()
     db.refresh(current_user)
 
     return user_to_userout(current_user)
 
+def is_admin(current_user: Principal) -> bool:
+    return current_user.role == "administrator"
+
+def serve_user_photo(db: Session, user_id: UUID, kind: str, if_none_match: Optional[str], current_user: Principal) -> Response:
+    # Photos are private: only their owner and administrators can fetch them. Other callers get
+    # the same 404 as a missing photo, so user ids can't be probed.
+    if user_id != current_user.id and not is_admin(current_user):
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    etag = get_photo_etag(db, user_id, kind)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+    if if_none_match and f'"{etag}"' in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    photo = get_photo(db, user_id, kind)
+    return Response(content=photo.data, media_type=photo.content_type, headers=headers)
+
+@router.get("/{user_id}/photo", response_class=Response)
+def get_user_photo(
+    user_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_verified_user)
+):
+    return serve_user_photo(db, user_id, PHOTO, if_none_match, current_user)
+
+@router.get("/{user_id}/thumbnail", response_class=Response)
+def get_user_thumbnail(
+    user_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_verified_user)
+):
+    return serve_user_photo(db, user_id, THUMBNAIL, if_none_match, current_user)
+
 def update_user_profile_fields(profile_data: Union[UserProfile, UserProfileUpdate], user: User):
     data = profile_data.dict(exclude_unset=True)
     if "profile_photo" in data:
@@ -225,7 +294,7 @@ def update_user_profile_fields(profile_data: Union[UserProfile, UserProfileUpdat
 def reset_user_profile_fields(user: User):
     profile_fields = [
         "first_name","last_name","address_line1","address_line2","city","state","zipcode",
-        "profile_photo","thumbnail_photo","personal_description","political_party",
+        "personal_description","political_party",
         "date_of_birth","gender","race","home_phone","cell_phone","occupation","employer",
         "website_url","social_media_handles","preferred_contact_method","interests","preferred_language"
     ]
@@ -236,7 +305,7 @@ def reset_user_profile_fields(user: User):
 def request_email_change(
     data: ChangeEmailRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: User = Depends(load_verified_user)
 ):
     if not verify_password(data.password, current_user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid password")
@@ -246,14 +315,14 @@ def request_email_change(
         raise HTTPException(status_code=400, detail="Email already in use")
 
     code = create_otp_code(db, current_user.id, "change_email", 30)
-    send_email(data.new_email, "Verify your new email", f"Your OTP code: {code}")
+    enqueue_email(db, data.new_email, "Verify your new email", f"Your OTP code: {code}")
     return {"message": "Check your new email for a verification code."}
 
 @router.post("/me/change-email/verify")
 def verify_email_change(
     data: ChangeEmailVerifyRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_verified_user)
+    current_user: User = Depends(load_verified_user)
 ):
     user = verify_otp_code(db, data.new_email, data.code, "change_email", user_id=current_user.id)
     if not user:
@@ -262,6 +331,6 @@ def verify_email_change(
     current_user.email = data.new_email
     current_user.token_version += 1
     db.commit()
-    db.refresh(current_user)
+    invalidate_principal(current_user.id)
 
     return {"message": "Email changed successfully."}
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import stripe
+import json
 from app.core.config import settings
 from app.core.database import get_db
-from app.models.user_letter_request import UserLetterRequest, LetterStatus
-from uuid import UUID
-from datetime import datetime
+from app.services.payment_service import get_stripe
+from app.services.lob_events import verify_lob_signature, parse_lob_event, record_lob_event
+from app.services.stripe_events import parse_stripe_event, record_stripe_event
 
 router = APIRouter()
 
@@ -14,11 +15,13 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     payload = await request.body()
     sig = request.headers.get("stripe-signature")
     endpoint_secret = settings.STRIPE_ENDPOINT_SECRET  # Make sure this is in your .env and config
+    stripe = get_stripe()
 
     try:
-        event = stripe.Webhook.construct_event(
+        stripe.Webhook.construct_event(
             payload=payload, sig_header=sig, secret=endpoint_secret
         )
+        event = parse_stripe_event(json.loads(payload))
     except ValueError:
         # Invalid payload
         raise HTTPException(status_code=400, detail="Invalid payload")
@@ -26,15 +29,26 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
         # Invalid signature
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    # Handle the event
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        letter_request_id = session["metadata"].get("letter_request_id")
-        if letter_request_id:
-            letter_req = db.query(UserLetterRequest).filter(UserLetterRequest.id == UUID(letter_request_id)).first()
-            if letter_req:
-                letter_req.status = LetterStatus.paid
-                letter_req.paid_at = datetime.utcnow()
-                db.commit()
+    # Only record the event here; the Stripe event applier marks letters paid
+    await run_in_threadpool(record_stripe_event, db, event)
+
+    return {"status": "success"}
+
+@router.post("/lob-webhook")
+async def lob_webhook(request: Request, db: Session = Depends(get_db)):
+    payload = await request.body()
+    sig = request.headers.get("lob-signature")
+    timestamp = request.headers.get("lob-signature-timestamp")
+
+    if not verify_lob_signature(payload, sig, timestamp):
+        raise HTTPException(status_code=400, detail="Invalid signature")
+
+    try:
+        event = parse_lob_event(json.loads(payload))
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid payload")
+
+    # Only append the event here; the Lob event applier folds it into mailing transactions
+    await run_in_threadpool(record_lob_event, db, event)
 
     return {"status": "success"}
@@ -0,0 +1,12 @@
+# app/schemas/bulk_status.py
+
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+class BulkStatusResult(BaseModel):
+    status: str
+    updated: int
+    # Rows moved, by the status they had before
+    updated_from: Dict[str, int]
+    # Requested ids that were not moved (missing, or the transition is not allowed); None for filters
+    skipped: Optional[int] = None
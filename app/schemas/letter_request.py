@@ -1,7 +1,7 @@
 # app/schemas/letter_request.py
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
@@ -39,5 +39,22 @@ class UserLetterRequestOut(BaseModel):
     class Config:
         from_attributes = True
 
+class LetterBulkFilter(BaseModel):
+    status: Optional[LetterStatus] = None
+    bill_id: Optional[UUID] = None
+    politician_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class LetterBulkStatusUpdate(BaseModel):
+    status: LetterStatus
+    # Exactly one of ids or filter
+    ids: Optional[List[UUID]] = None
+    filter: Optional[LetterBulkFilter] = None
+
+class LetterCartCheckout(BaseModel):
+    letter_request_ids: List[UUID]
+
 class LetterDraftRequest(BaseModel):
     personal_feedback: str
@@ -26,9 +26,12 @@ class MailingTransactionUpdate(BaseModel):
 class MailingTransactionOut(MailingTransactionBase):
     id: UUID
     external_mail_service_id: Optional[str]
+    idempotency_key: Optional[str]
     status: MailingStatus
     error_message: Optional[str]
     mail_service_response: Optional[Dict[str, Any]]
+    tracking_status: Optional[str]
+    tracking_updated_at: Optional[datetime]
     created_at: datetime
     updated_at: Optional[datetime]
 
@@ -1,7 +1,7 @@
 # app/schemas/queued_letter.py
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, field_validator
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
@@ -14,14 +14,27 @@ class QueuedLetterBase(BaseModel):
     user_letter_request_id: UUID
 
 class QueuedLetterCreate(QueuedLetterBase):
-    pass
+    priority: int = 0  # administrators only
+    scheduled_for: Optional[datetime] = None  # defaults to now
 
 class QueuedLetterUpdate(BaseModel):
+    # Omit a field to leave it unchanged; every queued letter needs all three, so null is rejected
     status: Optional[QueuedLetterStatus] = None
+    priority: Optional[int] = None
+    scheduled_for: Optional[datetime] = None
+
+    @field_validator("status", "priority", "scheduled_for")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
 
 class QueuedLetterOut(QueuedLetterBase):
     id: UUID
     status: QueuedLetterStatus
+    priority: int
+    scheduled_for: datetime
     created_at: datetime
 
     # Include these two fields to show associated bill and politician data
@@ -30,3 +43,40 @@ class QueuedLetterOut(QueuedLetterBase):
 
     class Config:
         from_attributes = True
+
+class QueuedLetterBulkFilter(BaseModel):
+    status: Optional[QueuedLetterStatus] = None
+    bill_id: Optional[UUID] = None
+    politician_id: Optional[UUID] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class QueuedLetterBulkStatusUpdate(BaseModel):
+    status: QueuedLetterStatus
+    # Exactly one of ids or filter
+    ids: Optional[List[UUID]] = None
+    filter: Optional[QueuedLetterBulkFilter] = None
+
+class OfficeAddressOut(BaseModel):
+    line1: str
+    line2: str
+    city: str
+    state: str
+    zip: str
+
+    class Config:
+        from_attributes = True
+
+class ClaimedLetterOut(QueuedLetterOut):
+    politician_name: str
+
+class OfficeBatchOut(BaseModel):
+    office_address: OfficeAddressOut
+    letters: List[ClaimedLetterOut]
+
+    class Config:
+        from_attributes = True
+
+class PrintBatchOut(BaseModel):
+    claimed: int
+    offices: List[OfficeBatchOut]
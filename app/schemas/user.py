@@ -110,8 +110,8 @@ class UserOut(UserBase):
     state: Optional[str] = None
     zipcode: Optional[str] = None
 
-    profile_photo: Optional[str] = None
-    thumbnail_photo: Optional[str] = None
+    profile_photo_url: Optional[str] = None
+    thumbnail_photo_url: Optional[str] = None
     personal_description: Optional[str] = None
     political_party: Optional[str] = None
     date_of_birth: Optional[date] = None
@@ -0,0 +1,69 @@
+# app/services/bulk_status.py
+
+from collections import Counter
+from typing import Dict, Iterable, List, Set
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app.models.queued_letter import QueuedLetter, QueuedLetterStatus
+from app.models.user_letter_request import UserLetterRequest, LetterStatus
+
+# Largest id list accepted by a single bulk request; use a filter for more
+MAX_BULK_IDS = 10000
+
+LETTER_TRANSITIONS: Dict[LetterStatus, Set[LetterStatus]] = {
+    LetterStatus.drafting: {LetterStatus.finalized},
+    LetterStatus.finalized: {LetterStatus.drafting, LetterStatus.paid},
+    LetterStatus.paid: {LetterStatus.mailed},
+    LetterStatus.mailed: set()
+}
+
+QUEUED_LETTER_TRANSITIONS: Dict[QueuedLetterStatus, Set[QueuedLetterStatus]] = {
+    QueuedLetterStatus.queued: {QueuedLetterStatus.processed},
+    QueuedLetterStatus.processed: {QueuedLetterStatus.queued}
+}
+
+def allowed_sources(transitions: dict, to_status) -> List:
+    return [from_status for from_status, targets in transitions.items() if to_status in targets]
+
+def bulk_transition(db: Session, model, transitions: dict, to_status, conditions: Iterable, extra_values: dict = None) -> Dict[str, int]:
+    """
+    Move every row of model matching conditions to to_status with a single UPDATE ... RETURNING.
+    Rows whose current status may not move to to_status are left alone. Returns the number of
+    rows moved from each previous status, and commits.
+    """
+    sources = allowed_sources(transitions, to_status)
+    if not sources:
+        return {}
+
+    # Lock and remember the previous status in the same statement, since RETURNING only sees new values
+    previous = (
+        select(model.id, model.status)
+        .where(*conditions)
+        .where(model.status.in_(sources))
+        .with_for_update()
+        .subquery("previous")
+    )
+    moved = db.execute(
+        update(model)
+        .where(model.id == previous.c.id)
+        .values(status=to_status, **(extra_values or {}))
+        .returning(previous.c.status)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+
+    return {from_status.value: count for from_status, count in Counter(moved).items()}
+
+def bulk_transition_letters(db: Session, to_status: LetterStatus, conditions: Iterable) -> Dict[str, int]:
+    extra_values = {}
+    if to_status == LetterStatus.paid:
+        # Keep paid_at meaningful for letters an operator marks paid by hand
+        extra_values["paid_at"] = func.coalesce(UserLetterRequest.paid_at, func.now())
+    return bulk_transition(db, UserLetterRequest, LETTER_TRANSITIONS, to_status, conditions, extra_values)
+
+def bulk_transition_queued_letters(db: Session, to_status: QueuedLetterStatus, conditions: Iterable) -> Dict[str, int]:
+    extra_values = {}
+    if to_status == QueuedLetterStatus.queued:
+        # Requeued letters must be claimable again
+        extra_values["claimed_at"] = None
+    return bulk_transition(db, QueuedLetter, QUEUED_LETTER_TRANSITIONS, to_status, conditions, extra_values)
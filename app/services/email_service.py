@@ -0,0 +1,187 @@
+# app/services/email_service.py
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+import requests
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from urllib3.exceptions import NewConnectionError
+from app.core.config import settings
+from app.core.http_client import http_client
+from app.core.throttling import backoff_delay
+from app.models.email_outbox import EmailOutbox, EmailStatus
+
+logger = logging.getLogger(__name__)
+
+# Mailgun accepts up to 1000 recipients per batch-send call
+MAILGUN_MAX_BATCH_RECIPIENTS = 1000
+
+class MailgunTransport:
+    max_batch_size = MAILGUN_MAX_BATCH_RECIPIENTS
+
+    def send_batch(self, subject: str, messages: List[Tuple[str, str]]) -> str:
+        """
+        Send one message per (to, body) pair sharing a subject in a single Mailgun call.
+        Each recipient gets their own body through recipient-variables, so nobody sees
+        another recipient's address or code. Returns the Mailgun message id.
+        """
+        url = f"{settings.MAILGUN_BASE_URL.rstrip('/')}/{settings.MAILGUN_DOMAIN}/messages"
+        auth = ("api", settings.MAILGUN_API_KEY)
+        data = {
+            "from": settings.EMAIL_FROM_ADDRESS,
+            "to": [to for to, _ in messages],
+            "subject": subject,
+            "text": "%recipient.body%",
+            "recipient-variables": json.dumps({to: {"body": body} for to, body in messages})
+        }
+        response = http_client.post(url, "mailgun", auth=auth, data=data)
+        try:
+            return response.json().get("id")
+        except ValueError:
+            # Accepted (2xx), just without a readable body; the emails are still sent
+            logger.warning("Mailgun accepted a batch but returned no JSON body")
+            return None
+
+class StubTransport:
+    """
+    Local transport that logs messages instead of sending them; sent messages are kept in `sent`.
+    """
+    max_batch_size = MAILGUN_MAX_BATCH_RECIPIENTS
+
+    def __init__(self):
+        self.sent = []
+
+    def send_batch(self, subject: str, messages: List[Tuple[str, str]]) -> str:
+        for to, body in messages:
+            logger.info("Stub email to %s: %s\n%s", to, subject, body)
+            self.sent.append((to, subject, body))
+        return f"stub-{len(self.sent)}"
+
+def get_transport():
+    if settings.EMAIL_TRANSPORT == "stub":
+        return StubTransport()
+    return MailgunTransport()
+
+def enqueue_email(db: Session, to: str, subject: str, body: str) -> EmailOutbox:
+    """
+    Record an email for the background sender and commit. Nothing is sent on the request path.
+    """
+    email = EmailOutbox(to_address=to, subject=subject, body=body, status=EmailStatus.pending, attempts=0)
+    db.add(email)
+    db.commit()
+    return email
+
+def _batches(emails, max_batch_size: int):
+    """
+    Group emails by subject into batches where each address appears at most once,
+    since recipient-variables are keyed by address.
+    """
+    by_subject = {}
+    for email in emails:
+        by_subject.setdefault(email.subject, []).append(email)
+
+    for subject, group in by_subject.items():
+        batch, addresses = [], set()
+        for email in group:
+            if email.to_address in addresses or len(batch) >= max_batch_size:
+                yield subject, batch
+                batch, addresses = [], set()
+            batch.append(email)
+            addresses.add(email.to_address)
+        if batch:
+            yield subject, batch
+
+def not_delivered(exc: Exception) -> bool:
+    """
+    True only when Mailgun certainly didn't accept the batch: the connection was never opened,
+    or it answered 429 or 5xx. After a read timeout or a dropped connection the batch may have
+    been accepted, and Mailgun has no idempotency key to make a resend safe.
+    """
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and (exc.response.status_code == 429 or exc.response.status_code >= 500)
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.ConnectionError) and exc.args:
+        return isinstance(getattr(exc.args[0], "reason", exc.args[0]), NewConnectionError)
+    return False
+
+def claim_due_emails(db: Session, batch_size: int, now: datetime) -> list:
+    """
+    Lease up to batch_size due emails to this sender by moving their next_attempt_at
+    EMAIL_SEND_LEASE_SECONDS ahead, and commit, so no row lock is held while Mailgun is called.
+    Returns (id, to_address, subject, body, attempts) rows.
+    """
+    due = (
+        select(EmailOutbox.id)
+        .where(EmailOutbox.status == EmailStatus.pending, EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due))
+        .values(next_attempt_at=now + timedelta(seconds=settings.EMAIL_SEND_LEASE_SECONDS))
+        .returning(EmailOutbox.id, EmailOutbox.to_address, EmailOutbox.subject, EmailOutbox.body, EmailOutbox.attempts)
+    ).all()
+    db.commit()
+    return rows
+
+def _record_batch(db: Session, batch: list, now: datetime, message_id: Optional[str], error: Optional[Exception]):
+    """
+    Store one batch's outcome. Emails Mailgun certainly didn't accept are rescheduled with
+    exponential backoff until EMAIL_MAX_ATTEMPTS; rejected ones (other 4xx) fail straight away;
+    ambiguous ones are left unconfirmed for manual review.
+    """
+    if error is None:
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_([email.id for email in batch]))
+            .values(
+                status=EmailStatus.sent, attempts=EmailOutbox.attempts + 1, sent_at=now,
+                provider_message_id=message_id, last_error=None
+            )
+        )
+        return
+
+    by_attempts = {}
+    for email in batch:
+        by_attempts.setdefault(email.attempts + 1, []).append(email.id)
+    retryable = not_delivered(error)
+    rejected = isinstance(error, requests.HTTPError) and not retryable
+
+    for attempts, ids in by_attempts.items():
+        values = {"attempts": attempts, "last_error": str(error)}
+        if rejected or (retryable and attempts >= settings.EMAIL_MAX_ATTEMPTS):
+            values["status"] = EmailStatus.failed
+        elif retryable:
+            values["next_attempt_at"] = now + timedelta(seconds=backoff_delay(attempts - 1, base=5.0, cap=1800.0))
+        else:
+            values["status"] = EmailStatus.unconfirmed
+        db.execute(update(EmailOutbox).where(EmailOutbox.id.in_(ids)).values(**values))
+
+def send_pending_emails(db: Session, transport, batch_size: int) -> int:
+    """
+    Lease up to batch_size due emails, send them in as few transport calls as possible and
+    record each batch's outcome as soon as it is known, so a crash never resends a batch that
+    was delivered. Returns the number of emails claimed.
+    """
+    now = datetime.now(timezone.utc)
+    emails = claim_due_emails(db, batch_size, now)
+
+    for subject, batch in _batches(emails, transport.max_batch_size):
+        message_id, error = None, None
+        try:
+            message_id = transport.send_batch(subject, [(e.to_address, e.body) for e in batch])
+        except Exception as e:
+            error = e
+            if not_delivered(e):
+                logger.warning("Failed to send %d emails (%s), will retry: %s", len(batch), subject, e)
+            else:
+                logger.exception("Sending %d emails (%s) failed with an unknown outcome", len(batch), subject)
+        _record_batch(db, batch, now, message_id, error)
+        db.commit()
+
+    return len(emails)
@@ -0,0 +1,111 @@
+# app/services/image_processing.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import TYPE_CHECKING, BinaryIO
+from app.core.bounded_executor import BoundedExecutor
+from app.core.config import settings
+from app.core.metrics import registry
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+PHOTO_SIZE = (400, 400)
+THUMBNAIL_SIZE = (40, 40)
+
+CONTENT_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+# Pillow releases the GIL while decoding, resizing and encoding, so a thread pool is enough.
+# Calls raise ExecutorBusy (429) once PROFILE_PHOTO_MAX_PENDING jobs are in flight.
+_pipeline = BoundedExecutor(
+    "image_pipeline",
+    lambda: ThreadPoolExecutor(max_workers=settings.PROFILE_PHOTO_WORKERS, thread_name_prefix="image-pipeline"),
+    max_pending=settings.PROFILE_PHOTO_MAX_PENDING
+)
+
+class ImageTooLarge(ValueError):
+    pass
+
+@dataclass(frozen=True)
+class ProcessedPhoto:
+    photo: bytes
+    thumbnail: bytes
+    content_type: str
+
+def read_upload(file: BinaryIO, max_bytes: int) -> bytes:
+    """
+    Read an upload in chunks, giving up as soon as it exceeds max_bytes.
+    """
+    buffer = BytesIO()
+    while True:
+        chunk = file.read(64 * 1024)
+        if not chunk:
+            return buffer.getvalue()
+        if buffer.tell() + len(chunk) > max_bytes:
+            raise ImageTooLarge(f"Image exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+        buffer.write(chunk)
+
+def _stage(name: str, start: float) -> float:
+    now = time.perf_counter()
+    registry.histogram(f"image_pipeline_stage_seconds:{name}").observe(now - start)
+    return now
+
+def _pil_image():
+    """
+    PIL.Image, imported by the first upload rather than at startup.
+    """
+    from PIL import Image
+
+    # Pillow only raises DecompressionBombError above twice this; _process checks the limit itself
+    Image.MAX_IMAGE_PIXELS = settings.PROFILE_PHOTO_MAX_PIXELS
+    return Image
+
+def _encode(img: "Image.Image", image_format: str) -> bytes:
+    output = BytesIO()
+    if image_format == "WEBP":
+        img.save(output, format="WEBP", quality=settings.PROFILE_PHOTO_QUALITY, method=4)
+    else:
+        img.save(output, format="JPEG", quality=settings.PROFILE_PHOTO_QUALITY, optimize=True, progressive=True)
+    return output.getvalue()
+
+def _process(data: bytes) -> ProcessedPhoto:
+    Image = _pil_image()
+    start = time.perf_counter()
+    try:
+        img = Image.open(BytesIO(data))
+        # Image.open only reads the header, so oversized images are rejected before any decoding
+        if img.width * img.height > settings.PROFILE_PHOTO_MAX_PIXELS:
+            raise ImageTooLarge(f"Image exceeds the {settings.PROFILE_PHOTO_MAX_PIXELS:,} pixel limit.")
+        # For JPEGs, let the decoder downscale by up to 8x while decoding
+        img.draft("RGB", PHOTO_SIZE)
+        img.load()
+    except (OSError, Image.DecompressionBombError):
+        raise ValueError("Could not identify image file.")
+
+    image_format = settings.PROFILE_PHOTO_FORMAT.upper()
+    mode = "RGBA" if image_format == "WEBP" and ("A" in img.getbands() or "transparency" in img.info) else "RGB"
+    if img.mode != mode:
+        img = img.convert(mode)
+    start = _stage("decode", start)
+
+    photo = img.resize(PHOTO_SIZE, Image.LANCZOS, reducing_gap=3.0)
+    # The thumbnail is derived from the already reduced photo, not the full-resolution upload
+    thumbnail = photo.resize(THUMBNAIL_SIZE, Image.LANCZOS)
+    start = _stage("resize", start)
+
+    result = ProcessedPhoto(
+        photo=_encode(photo, image_format),
+        thumbnail=_encode(thumbnail, image_format),
+        content_type=CONTENT_TYPES[image_format]
+    )
+    _stage("encode", start)
+    return result
+
+def process_profile_photo(data: bytes) -> ProcessedPhoto:
+    """
+    Decode, resize and re-encode an uploaded photo in the bounded image pool.
+    Raises ImageTooLarge above PROFILE_PHOTO_MAX_PIXELS and ValueError for images that cannot be decoded.
+    """
+    return _pipeline.run(_process, data)
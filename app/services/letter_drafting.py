@@ -1,15 +1,28 @@
 # app/services/letter_drafting.py
 
 import json
-from bs4 import BeautifulSoup
-from langchain_ollama import OllamaLLM
+import threading
 from app.core.config import settings
 
-llm = OllamaLLM(
-    base_url=settings.OLLAMA_BASE_URL,
-    model=settings.OLLAMA_MODEL,
-    format="json"  # Tells OllamaLLM to interpret response as JSON if possible
-)
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """
+    Ollama client, built on the first draft. langchain is slow to import, so app startup doesn't pay for it.
+    """
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_ollama import OllamaLLM
+
+                _llm = OllamaLLM(
+                    base_url=settings.OLLAMA_BASE_URL,
+                    model=settings.OLLAMA_MODEL,
+                    format="json"  # Tells OllamaLLM to interpret response as JSON if possible
+                )
+    return _llm
 
 def draft_letter(user_comments: str) -> str:
     # Revised prompt: no stance/support-level references.
@@ -32,9 +45,11 @@ def draft_letter(user_comments: str) -> str:
     Respond with only a JSON object, nothing else.
     """
 
-    response = llm.invoke(prompt)
+    response = get_llm().invoke(prompt)
 
     # If the response contains HTML or other formatting, strip it out with BeautifulSoup
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(response, "html.parser")
     cleaned_response = soup.get_text()
 
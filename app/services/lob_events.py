@@ -0,0 +1,173 @@
+# app/services/lob_events.py
+
+import hashlib
+import hmac
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import DateTime, String, column, func, or_, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.throttling import backoff_delay
+from app.models.lob_event import LobEvent
+from app.models.mailing_transaction import MailingTransaction
+
+def verify_lob_signature(payload: bytes, signature: str, timestamp: str) -> bool:
+    """
+    Lob signs "<timestamp>.<raw body>" with HMAC-SHA256 using the webhook secret.
+    Stale timestamps are rejected to prevent replays.
+    """
+    if not settings.LOB_WEBHOOK_SECRET or not signature or not timestamp:
+        return False
+    try:
+        sent_at = float(timestamp)
+    except ValueError:
+        return False
+    if sent_at > 1e12:  # milliseconds
+        sent_at /= 1000.0
+    if abs(time.time() - sent_at) > settings.LOB_WEBHOOK_TOLERANCE_SECONDS:
+        return False
+
+    expected = hmac.new(
+        settings.LOB_WEBHOOK_SECRET.encode("utf-8"),
+        timestamp.encode("utf-8") + b"." + payload,
+        hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def parse_lob_event(event: dict) -> dict:
+    """
+    Extract the columns stored for a Lob event. Raises ValueError for malformed events.
+    """
+    try:
+        event_id = event["id"]
+        event_type = event["event_type"]["id"]
+    except (KeyError, TypeError):
+        raise ValueError("Malformed Lob event")
+
+    body = event.get("body") or {}
+    occurred_at = datetime.now(timezone.utc)
+    if event.get("date_created"):
+        try:
+            occurred_at = datetime.fromisoformat(event["date_created"].replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError("Malformed Lob event date_created")
+
+    return {
+        "id": event_id,
+        "event_type": event_type,
+        "resource_id": body.get("id"),
+        "occurred_at": occurred_at,
+        "payload": event
+    }
+
+def record_lob_event(db: Session, event: dict):
+    """
+    Append a parsed event; redeliveries of the same event id are ignored.
+    """
+    db.execute(insert(LobEvent).values(**event).on_conflict_do_nothing(index_elements=[LobEvent.id]))
+    db.commit()
+
+def tracking_status_for(event_type: str) -> str:
+    # "letter.returned_to_sender" -> "returned_to_sender"
+    return event_type.split(".", 1)[-1]
+
+def _defer_unmatched(db: Session, events: list, now: datetime):
+    """
+    Retry events whose letter has no MailingTransaction yet with backoff; the webhook can arrive
+    before the transaction recording Lob's response is committed. Events without a resource id,
+    or out of attempts, are dead-lettered.
+    """
+    by_attempts = {}
+    for event in events:
+        by_attempts.setdefault((event.attempts + 1, event.resource_id is None), []).append(event.id)
+
+    for (attempts, missing_resource), ids in by_attempts.items():
+        changes = {"attempts": attempts}
+        if missing_resource:
+            changes.update(dead_lettered_at=now, last_error="Event has no resource id")
+        elif attempts >= settings.LOB_EVENT_MAX_ATTEMPTS:
+            changes.update(dead_lettered_at=now, last_error="No mailing transaction with this resource id")
+        else:
+            changes.update(
+                next_attempt_at=now + timedelta(seconds=backoff_delay(attempts - 1, base=5.0, cap=1800.0)),
+                last_error="No mailing transaction with this resource id yet"
+            )
+        db.execute(
+            update(LobEvent)
+            .where(LobEvent.id.in_(ids))
+            .values(**changes)
+            .execution_options(synchronize_session=False)
+        )
+
+def apply_pending_lob_events(db: Session, batch_size: int) -> int:
+    """
+    Fold up to batch_size due events into MailingTransaction tracking fields with one UPDATE,
+    then mark them applied. Only the newest event per letter is applied, and never over a newer one.
+    Events that match no MailingTransaction stay unapplied and are retried later.
+    Returns the number of events consumed.
+    """
+    now = datetime.now(timezone.utc)
+    events = (
+        db.query(LobEvent.id, LobEvent.event_type, LobEvent.resource_id, LobEvent.occurred_at, LobEvent.attempts)
+        .filter(
+            LobEvent.applied_at.is_(None),
+            LobEvent.dead_lettered_at.is_(None),
+            LobEvent.next_attempt_at <= now
+        )
+        .order_by(LobEvent.received_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not events:
+        db.rollback()
+        return 0
+
+    resource_ids = {e.resource_id for e in events if e.resource_id}
+    known = set(db.execute(
+        select(MailingTransaction.external_mail_service_id)
+        .where(MailingTransaction.external_mail_service_id.in_(resource_ids))
+    ).scalars()) if resource_ids else set()
+    matched = [e for e in events if e.resource_id in known]
+    unmatched = [e for e in events if e.resource_id not in known]
+
+    latest = {}
+    for event_id, event_type, resource_id, occurred_at, _ in matched:
+        current = latest.get(resource_id)
+        if current is None or occurred_at > current[1]:
+            latest[resource_id] = (tracking_status_for(event_type), occurred_at)
+
+    if latest:
+        latest_events = values(
+            column("resource_id", String),
+            column("tracking_status", String),
+            column("occurred_at", DateTime(timezone=True)),
+            name="latest_events"
+        ).data([(resource_id, status, occurred_at) for resource_id, (status, occurred_at) in latest.items()])
+
+        db.execute(
+            update(MailingTransaction)
+            .where(MailingTransaction.external_mail_service_id == latest_events.c.resource_id)
+            .where(or_(
+                MailingTransaction.tracking_updated_at.is_(None),
+                MailingTransaction.tracking_updated_at < latest_events.c.occurred_at
+            ))
+            .values(
+                tracking_status=latest_events.c.tracking_status,
+                tracking_updated_at=latest_events.c.occurred_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        db.execute(
+            update(LobEvent)
+            .where(LobEvent.id.in_([e.id for e in matched]))
+            .values(applied_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    if unmatched:
+        _defer_unmatched(db, unmatched, now)
+    db.commit()
+    return len(events)
@@ -1,10 +1,128 @@
 # app/services/mailing_service.py
 
-import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 import requests
+from urllib3.exceptions import NewConnectionError
+from sqlalchemy import exists, func, select
 from app.core.config import settings
+from app.core.http_client import http_client, RetryPolicy, NO_RETRY
+from app.models.mailing_transaction import MailingTransaction, MailingStatus
+from app.models.queued_letter import QueuedLetter
+from app.models.user_letter_request import UserLetterRequest, LetterStatus
 
-LOB_BASE_URL = "https://api.lob.com/v1/letters"
+LOB_LETTERS_URL = f"{settings.LOB_BASE_URL.rstrip('/')}/letters"
+
+def lob_idempotency_key(letter_request_id) -> str:
+    """
+    Deterministic per letter request, so every attempt to mail the same letter is deduplicated by Lob.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"letterlobby/lob/letters/{letter_request_id}"))
+
+# Conditions under which the mailing dispatcher leaves a paid letter alone, shared by its claim
+# query and by dispatch_blocker so the /mail endpoint never promises what the dispatcher won't do.
+
+# Attempts that stop the letter from being mailed again until an administrator looks at them
+UNRESOLVED_STATUSES = (MailingStatus.failed, MailingStatus.unconfirmed)
+
+def unresolved_attempt_exists(letter_request_id, statuses=UNRESOLVED_STATUSES):
+    return exists().where(
+        MailingTransaction.user_letter_request_id == letter_request_id,
+        MailingTransaction.status.in_(statuses),
+        MailingTransaction.retried_at.is_(None)
+    )
+
+def attempt_in_flight_exists(letter_request_id):
+    # A pending attempt older than MAILING_PENDING_STALE_SECONDS is assumed abandoned and resumed
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.MAILING_PENDING_STALE_SECONDS)
+    return exists().where(
+        MailingTransaction.user_letter_request_id == letter_request_id,
+        MailingTransaction.status == MailingStatus.pending,
+        func.coalesce(MailingTransaction.updated_at, MailingTransaction.created_at) > stale_before
+    )
+
+def queued_for_print_exists(letter_request_id):
+    return exists().where(QueuedLetter.user_letter_request_id == letter_request_id)
+
+def dispatch_blocker(db, letter_request_id) -> Optional[str]:
+    """
+    Why the mailing dispatcher won't pick up this paid letter, or None if it will.
+    """
+    if db.execute(select(queued_for_print_exists(letter_request_id))).scalar():
+        return "Letter is queued for printing."
+    if db.execute(select(attempt_in_flight_exists(letter_request_id))).scalar():
+        return "A mailing attempt for this letter is already in progress."
+    retry_hint = f"an administrator can retry it with POST /letter-requests/{letter_request_id}/mail/retry."
+    if db.execute(select(unresolved_attempt_exists(letter_request_id, (MailingStatus.unconfirmed,)))).scalar():
+        return "Lob may already have accepted a previous mailing attempt; " + retry_hint
+    if db.execute(select(unresolved_attempt_exists(letter_request_id, (MailingStatus.failed,)))).scalar():
+        return "A previous mailing attempt failed; " + retry_hint
+    return None
+
+def unresolved_attempts(db, letter_request_id) -> list:
+    """
+    The letter's failed and unconfirmed attempts that have not been retried, newest first.
+    """
+    return (
+        db.query(MailingTransaction)
+        .filter(
+            MailingTransaction.user_letter_request_id == letter_request_id,
+            MailingTransaction.status.in_(UNRESOLVED_STATUSES),
+            MailingTransaction.retried_at.is_(None)
+        )
+        .order_by(MailingTransaction.created_at.desc())
+        .all()
+    )
+
+def mark_attempts_retried(db, attempts) -> int:
+    """
+    Set unresolved attempts aside so the dispatcher picks the letter up again; they stay in the
+    history. Only call this once find_lob_letter has shown that Lob has no letter for them: Lob
+    forgets idempotency keys after about 24 hours, so the key alone doesn't make a late retry safe.
+    Returns the number of attempts marked, without committing.
+    """
+    for attempt in attempts:
+        attempt.retried_at = func.now()
+    return len(attempts)
+
+def find_lob_letter(letter_request_id) -> Optional[dict]:
+    """
+    The letter Lob created for this letter request, found through the letter_request_id metadata
+    every attempt is sent with, or None. Raises requests.RequestException if Lob can't be asked.
+    """
+    response = http_client.get(
+        LOB_LETTERS_URL, "lob", auth=(settings.LOB_API_KEY, ''),
+        params={"metadata[letter_request_id]": str(letter_request_id), "limit": 1}
+    )
+    letters = response.json().get("data") or []
+    return letters[0] if letters else None
+
+def lob_never_accepted(exc: Exception) -> bool:
+    """
+    True only when Lob certainly didn't accept the letter: it answered with a 4xx such as a rejected
+    address or 429, or the connection was never opened. After a read timeout, a dropped connection,
+    a 5xx or an unparseable reply the letter may already be printed.
+    """
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and 400 <= exc.response.status_code < 500
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.ConnectionError) and exc.args:
+        return isinstance(getattr(exc.args[0], "reason", exc.args[0]), NewConnectionError)
+    return False
+
+def record_sent(db, mailing_tx: MailingTransaction, mail_response: dict):
+    """
+    Mark the attempt sent with Lob's letter and the letter request mailed, without committing.
+    """
+    mailing_tx.status = MailingStatus.sent
+    mailing_tx.external_mail_service_id = mail_response.get("id")
+    mailing_tx.error_message = None
+    mailing_tx.mail_service_response = mail_response
+    db.query(UserLetterRequest).filter(UserLetterRequest.id == mailing_tx.user_letter_request_id).update(
+        {UserLetterRequest.status: LetterStatus.mailed}, synchronize_session=False
+    )
 
 def format_letter_text(
     letter_text: str,
@@ -66,12 +184,19 @@ def send_letter(
     recipient_name: str,
     recipient_address: dict,
     sender_name: str,
-    sender_address: dict
+    sender_address: dict,
+    idempotency_key: str = None,
+    retry: RetryPolicy = NO_RETRY,
+    rate_limiter=None,
+    metadata: dict = None
 ) -> dict:
     """
     Sends the formatted HTML letter to Lob as a multipart/form-data file upload.
+    Read timeouts should only be retried when an idempotency_key is given.
+    metadata is stored on the Lob letter, so it can be looked up later.
     """
     auth = (settings.LOB_API_KEY, '')
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
 
     files = {
         'file': ('letter.html', formatted_html, 'text/html')
@@ -99,78 +224,78 @@ def send_letter(
         "double_sided": "false",
         "use_type": "operational"
     }
+    for key, value in (metadata or {}).items():
+        data[f"metadata[{key}]"] = value
 
-    response = requests.post(LOB_BASE_URL, auth=auth, data=data, files=files)
-    response.raise_for_status()
+    response = http_client.post(
+        LOB_LETTERS_URL, "lob", auth=auth, headers=headers, data=data, files=files,
+        retry=retry, rate_limiter=rate_limiter
+    )
     return response.json()
 
-def mail_letter(letter_req, db, sender_address: dict):
+def mail_letter(ctx, db, max_attempts: int = 3, rate_limiter=None):
     """
-    Send the letter via Lob and record the result in a mailing transaction.
-    'sender_address' should be a dict with keys: line1, line2(optional), city, state, zip, organization_name(optional)
+    Send the letter described by a LetterRenderContext via Lob and record the result in a mailing transaction.
+
+    A pending MailingTransaction carrying the letter's idempotency key is committed before Lob is called,
+    so network errors and timeouts can be retried here without mailing twice. The transaction is then
+    reconciled to sent, to failed when Lob certainly didn't accept the letter, or to unconfirmed when it
+    may have. rate_limiter (a TokenBucket) is acquired before every call to Lob. Returns the
+    MailingTransaction and the Lob response.
     """
-    if letter_req.status != "paid":
+    if ctx.status != LetterStatus.paid:
         raise ValueError("Letter not paid for mailing.")
 
-    letter_data = json.loads(letter_req.final_letter_text)
-    letter_text = letter_data.get("letter", "")
+    if not ctx.has_return_address:
+        raise ValueError("No global return address set.")
 
-    if not letter_text or not isinstance(letter_text, str):
-        raise ValueError("No valid 'letter' field found in final_letter_text.")
+    formatted_html = ctx.render_html()
+    recipient_address = ctx.recipient_address.as_dict()
+    sender_address = ctx.sender_address.as_dict()
+    idempotency_key = lob_idempotency_key(ctx.letter_request_id)
 
-    politician = letter_req.politician
-    recipient_name = politician.name
-    recipient_address = {
-        "line1": politician.office_address_line1,
-        "line2": politician.office_address_line2 or "",
-        "city": politician.office_city,
-        "state": politician.office_state,
-        "zip": politician.office_zip
-    }
-
-    sender_name = sender_address.get("organization_name","Your Organization")
-    formatted_html = format_letter_text(
-        letter_text,
-        recipient_name,
-        recipient_address,
-        sender_name=sender_name,
-        sender_address=sender_address
+    # Resume an interrupted attempt if there is one, otherwise record the intent to mail
+    mailing_tx = (
+        db.query(MailingTransaction)
+        .filter(
+            MailingTransaction.user_letter_request_id == ctx.letter_request_id,
+            MailingTransaction.status == MailingStatus.pending
+        )
+        .order_by(MailingTransaction.created_at.desc())
+        .first()
     )
-
-    from app.models.mailing_transaction import MailingTransaction, MailingStatus
+    if mailing_tx is None:
+        mailing_tx = MailingTransaction(
+            user_letter_request_id=ctx.letter_request_id,
+            status=MailingStatus.pending,
+            idempotency_key=idempotency_key
+        )
+        db.add(mailing_tx)
+    else:
+        mailing_tx.idempotency_key = idempotency_key
+        mailing_tx.updated_at = func.now()
+    db.commit()
 
     try:
         mail_response = send_letter(
             formatted_html,
-            recipient_name,
+            ctx.recipient_name,
             recipient_address,
-            sender_name=sender_name,
-            sender_address=sender_address
-        )
-    except requests.HTTPError as e:
-        # On failure, record a failed mailing transaction
-        mailing_tx = MailingTransaction(
-            user_letter_request_id=letter_req.id,
-            external_mail_service_id=None,
-            status=MailingStatus.failed,
-            error_message=str(e),
-            mail_service_response=None
+            sender_name=ctx.sender_name,
+            sender_address=sender_address,
+            idempotency_key=idempotency_key,
+            retry=RetryPolicy(max_attempts=max_attempts),
+            rate_limiter=rate_limiter,
+            metadata={"letter_request_id": str(ctx.letter_request_id)}
         )
-        db.add(mailing_tx)
+    except requests.RequestException as e:
+        # An unconfirmed letter may be printed already; the retry endpoint asks Lob before mailing it again
+        mailing_tx.status = MailingStatus.failed if lob_never_accepted(e) else MailingStatus.unconfirmed
+        mailing_tx.error_message = str(e)
         db.commit()
         raise
 
-    # On success, record a successful mailing transaction with mail_service_response
-    mailing_tx = MailingTransaction(
-        user_letter_request_id=letter_req.id,
-        external_mail_service_id=mail_response.get("id"),
-        status=MailingStatus.sent,
-        error_message=None,
-        mail_service_response=mail_response
-    )
-    db.add(mailing_tx)
-    letter_req.status = "mailed"
+    record_sent(db, mailing_tx, mail_response)
     db.commit()
-    db.refresh(letter_req)
 
-    return mail_response
+    return mailing_tx, mail_response
@@ -1,27 +1,67 @@
 # app/services/otp_service.py
 
+import hmac
 import uuid
 import random
 import string
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.kv_store import get_kv_store
 from app.models.otp_code import OTPCode
 from app.models.user import User
-from app.core.config import settings
-import requests
 
 def generate_otp_code(length=6):
     return ''.join(random.choices(string.digits, k=length))
 
+def _otp_key(user_id: uuid.UUID, purpose: str) -> str:
+    return f"otp:{purpose}:{user_id}"
+
 def create_otp_code(db: Session, user_id: uuid.UUID, purpose: str, expires_in_minutes=30):
     code = generate_otp_code()
+
+    if settings.OTP_STORAGE == "kv":
+        # Overwriting the key supersedes any earlier code for the same purpose
+        get_kv_store().set(_otp_key(user_id, purpose), code, expires_in_minutes * 60)
+        return code
+
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=expires_in_minutes)
+    # A new code supersedes any earlier ones for the same purpose
+    db.query(OTPCode).filter(
+        OTPCode.user_id == user_id,
+        OTPCode.purpose == purpose
+    ).delete(synchronize_session=False)
     otp = OTPCode(user_id=user_id, code=code, purpose=purpose, expires_at=expires_at)
     db.add(otp)
     db.commit()
     db.refresh(otp)
     return code
 
+def consume_otp_code(db: Session, user_id: uuid.UUID, code: str, purpose: str) -> bool:
+    """
+    Check a code and delete it if it is valid, so each code can only be used once.
+    """
+    if settings.OTP_STORAGE == "kv":
+        store = get_kv_store()
+        key = _otp_key(user_id, purpose)
+        stored = store.get(key)
+        if stored is None or not hmac.compare_digest(stored, code):
+            return False
+        # Only the caller that actually removes the key wins a concurrent race
+        return store.delete(key)
+
+    otp = db.query(OTPCode.id, OTPCode.expires_at).filter(
+        OTPCode.user_id == user_id,
+        OTPCode.purpose == purpose,
+        OTPCode.code == code
+    ).first()
+    if not otp or otp.expires_at < datetime.now(timezone.utc):
+        return False
+    db.query(OTPCode).filter(OTPCode.id == otp.id).delete(synchronize_session=False)
+    db.commit()
+    return True
+
 def verify_otp_code(db: Session, identifier: str, code: str, purpose: str, user_id: uuid.UUID = None):
     """
     identifier: For 'verify_email' or 'reset_password', this is the user's email.
@@ -32,15 +72,8 @@ def verify_otp_code(db: Session, identifier: str, code: str, purpose: str, user_
         if not user_id:
             return False
         # For change_email, find OTP by user_id, code, and purpose directly
-        otp = db.query(OTPCode).filter(
-            OTPCode.user_id == user_id,
-            OTPCode.code == code,
-            OTPCode.purpose == purpose
-        ).first()
-        if not otp or otp.expires_at < datetime.now(timezone.utc):
+        if not consume_otp_code(db, user_id, code, purpose):
             return False
-        db.delete(otp)
-        db.commit()
         user = db.query(User).filter(User.id == user_id).first()
         return user
     else:
@@ -48,29 +81,26 @@ def verify_otp_code(db: Session, identifier: str, code: str, purpose: str, user_
         user = db.query(User).filter(User.email == identifier).first()
         if not user:
             return False
-        otp = db.query(OTPCode).filter(
-            OTPCode.user_id == user.id,
-            OTPCode.code == code,
-            OTPCode.purpose == purpose
-        ).first()
-        if not otp or otp.expires_at < datetime.now(timezone.utc):
+        if not consume_otp_code(db, user.id, code, purpose):
             return False
-        db.delete(otp)
-        db.commit()
         return user
 
-def send_email(to: str, subject: str, body: str):
-    url = f"https://api.mailgun.net/v3/{settings.MAILGUN_DOMAIN}/messages"
-    auth = ("api", settings.MAILGUN_API_KEY)
-    data = {
-        "from": "letterlobby@serviceorchard.com",
-        "to": [to],
-        "subject": subject,
-        "text": body
-    }
-    response = requests.post(url, auth=auth, data=data)
-
-    if response.status_code != 200:
-        print("Failed to send email:", response.text)
-    else:
-        print(f"Email sent to {to}: {subject}")
+def purge_expired_otp_codes(db: Session, batch_size: int = 1000) -> int:
+    """
+    Delete expired codes in batches of batch_size, committing after each batch so locks stay short.
+    Returns the number of rows deleted.
+    """
+    total = 0
+    while True:
+        expired_ids = (
+            select(OTPCode.id)
+            .where(OTPCode.expires_at < datetime.now(timezone.utc))
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = db.execute(delete(OTPCode).where(OTPCode.id.in_(expired_ids)))
+        db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
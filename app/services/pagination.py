@@ -0,0 +1,49 @@
+# app/services/pagination.py
+
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Inverse of encode_cursor. Raises ValueError for cursors this module did not produce.
+    """
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def _keyset_query(query, created_at_column, id_column, cursor: Optional[str], limit: int):
+    if cursor:
+        query = query.filter(tuple_(created_at_column, id_column) > tuple_(*decode_cursor(cursor)))
+    return query.order_by(created_at_column, id_column).limit(limit + 1)
+
+def _page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+def keyset_page(query, created_at_column, id_column, cursor: Optional[str], limit: int) -> Tuple[List, Optional[str]]:
+    """
+    Fetch the page of query after cursor in (created_at, id) order, which an index on those two
+    columns serves without an OFFSET scan. Rows must expose created_at and id. Returns the rows
+    and the cursor for the next page, or None on the last page.
+    """
+    rows = _keyset_query(query, created_at_column, id_column, cursor, limit).all()
+    return _page(rows, limit)
+
+async def keyset_page_async(db: AsyncSession, stmt, created_at_column, id_column, cursor: Optional[str], limit: int) -> Tuple[List, Optional[str]]:
+    """
+    keyset_page for a select() statement on an AsyncSession.
+    """
+    rows = (await db.execute(_keyset_query(stmt, created_at_column, id_column, cursor, limit))).all()
+    return _page(rows, limit)
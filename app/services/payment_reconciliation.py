@@ -0,0 +1,154 @@
+# app/services/payment_reconciliation.py
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+from uuid import UUID
+from sqlalchemy import DateTime, column, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+from app.models.user_letter_request import UserLetterRequest, LetterStatus
+from app.services.payment_service import get_stripe, letter_ids_from_metadata
+from app.services.stripe_events import PAYABLE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Stripe's maximum page size for list endpoints
+STRIPE_MAX_PAGE_SIZE = 100
+
+@dataclass
+class ReconciliationReport:
+    """
+    Discrepancies found between Stripe checkout sessions and letter statuses.
+    """
+    since: datetime
+    sessions_scanned: int = 0
+    paid_sessions: int = 0
+    # Paid in Stripe but not marked paid here (lost webhook); fixed by the run
+    letters_fixed: List[str] = field(default_factory=list)
+    # Paid sessions naming letter ids that don't exist
+    unknown_letters: List[str] = field(default_factory=list)
+    # Letters paid by more than one session, with the session ids
+    duplicate_payments: Dict[str, List[str]] = field(default_factory=dict)
+    # Letters with a stored checkout session marked paid since `since` with no paid session in the scanned window
+    paid_without_session: List[str] = field(default_factory=list)
+    # Letters marked paid since `since` that never had a checkout session, e.g. set paid by an admin;
+    # listed for reference, not a discrepancy
+    paid_outside_checkout: List[str] = field(default_factory=list)
+
+    @property
+    def has_discrepancies(self) -> bool:
+        return bool(self.letters_fixed or self.unknown_letters or self.duplicate_payments or self.paid_without_session)
+
+    def as_dict(self) -> dict:
+        return {
+            "since": self.since.isoformat(),
+            "sessions_scanned": self.sessions_scanned,
+            "paid_sessions": self.paid_sessions,
+            "letters_fixed": self.letters_fixed,
+            "unknown_letters": self.unknown_letters,
+            "duplicate_payments": self.duplicate_payments,
+            "paid_without_session": self.paid_without_session,
+            "paid_outside_checkout": self.paid_outside_checkout
+        }
+
+def iter_checkout_sessions(since: datetime, page_size: int = STRIPE_MAX_PAGE_SIZE) -> Iterator[dict]:
+    """
+    Yield every checkout session created at or after since, newest first, following Stripe's
+    starting_after cursor one page at a time.
+    """
+    stripe = get_stripe()
+    params = {"limit": min(page_size, STRIPE_MAX_PAGE_SIZE), "created": {"gte": int(since.timestamp())}}
+    while True:
+        page = stripe.checkout.Session.list(**params)
+        for session in page["data"]:
+            yield session
+        if not page["has_more"] or not page["data"]:
+            return
+        params["starting_after"] = page["data"][-1]["id"]
+
+def paid_sessions_by_letter(sessions, report: ReconciliationReport) -> Dict[UUID, List[dict]]:
+    """
+    Map each letter id to the paid sessions naming it in their metadata.
+    """
+    by_letter = {}
+    for session in sessions:
+        report.sessions_scanned += 1
+        if session.get("payment_status") != "paid":
+            continue
+        report.paid_sessions += 1
+        for letter_request_id in letter_ids_from_metadata(session.get("metadata") or {}):
+            try:
+                letter_id = UUID(letter_request_id)
+            except ValueError:
+                report.unknown_letters.append(letter_request_id)
+                continue
+            by_letter.setdefault(letter_id, []).append(session)
+    return by_letter
+
+def stripe_paid_at(sessions: List[dict]) -> datetime:
+    """
+    When the letter was paid according to Stripe: the creation time of its earliest paid session.
+    Checkout sessions carry no completion time, and they expire within a day of being created.
+    """
+    return datetime.fromtimestamp(min(int(session["created"]) for session in sessions), tz=timezone.utc)
+
+def reconcile_payments(db: Session, since: datetime, batch_size: int, page_size: int = STRIPE_MAX_PAGE_SIZE) -> ReconciliationReport:
+    """
+    Compare paid Stripe checkout sessions created since `since` with letter statuses. Letters that
+    are paid in Stripe but still drafting or finalized here are marked paid, batch_size letters per
+    UPDATE, with paid_at taken from Stripe. Returns the report of everything that did not match.
+    """
+    report = ReconciliationReport(since=since)
+    by_letter = paid_sessions_by_letter(iter_checkout_sessions(since, page_size), report)
+
+    report.duplicate_payments = {
+        str(letter_id): [session["id"] for session in sessions]
+        for letter_id, sessions in by_letter.items() if len(sessions) > 1
+    }
+
+    letter_ids = list(by_letter)
+    for start in range(0, len(letter_ids), batch_size):
+        batch = letter_ids[start:start + batch_size]
+        known = {
+            letter_id for (letter_id,) in
+            db.query(UserLetterRequest.id).filter(UserLetterRequest.id.in_(batch)).all()
+        }
+        report.unknown_letters.extend(str(letter_id) for letter_id in batch if letter_id not in known)
+
+        payments = values(
+            column("letter_id", PG_UUID(as_uuid=True)),
+            column("paid_at", DateTime(timezone=True)),
+            name="stripe_payments"
+        ).data([(letter_id, stripe_paid_at(by_letter[letter_id])) for letter_id in batch])
+
+        fixed = db.execute(
+            update(UserLetterRequest)
+            .where(UserLetterRequest.id == payments.c.letter_id)
+            .where(UserLetterRequest.status.in_(PAYABLE_STATUSES))
+            .values(status=LetterStatus.paid, paid_at=payments.c.paid_at)
+            .returning(UserLetterRequest.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.commit()
+        report.letters_fixed.extend(str(letter_id) for letter_id in fixed)
+
+    # Letters paid inside the window whose payment Stripe doesn't know about. Only letters that went
+    # through checkout can be matched; the rest were set paid by other means, such as bulk-status.
+    paid_ids = set(by_letter)
+    paid_here = (
+        db.query(UserLetterRequest.id, UserLetterRequest.checkout_session_id)
+        .filter(UserLetterRequest.paid_at >= since)
+        .yield_per(batch_size)
+    )
+    for letter_id, checkout_session_id in paid_here:
+        if letter_id in paid_ids:
+            continue
+        if checkout_session_id is None:
+            report.paid_outside_checkout.append(str(letter_id))
+        else:
+            report.paid_without_session.append(str(letter_id))
+    db.rollback()
+
+    return report
@@ -1,9 +1,56 @@
 # app/services/payment_service.py
 
-import stripe
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.models.user_letter_request import UserLetterRequest
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+_stripe = None
+
+def get_stripe():
+    """
+    The stripe module, imported and configured on first use. It is slow to import and most
+    requests never talk to Stripe.
+    """
+    global _stripe
+    if _stripe is None:
+        import stripe
+
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        if settings.STRIPE_API_BASE:
+            stripe.api_base = settings.STRIPE_API_BASE
+        _stripe = stripe
+    return _stripe
+
+LETTER_PRICE_CENTS = 500  # $5.00 per letter
+
+# Stripe allows at most 100 line items per session and 500 characters per metadata value,
+# so cart letter ids are spread over letter_request_ids_<n> keys, 13 ids per key.
+MAX_CART_LETTERS = 100
+LETTER_IDS_PER_METADATA_KEY = 13
+
+def letter_ids_metadata(letter_ids: Sequence[UUID]) -> dict:
+    ids = [str(letter_id) for letter_id in letter_ids]
+    return {
+        f"letter_request_ids_{n}": ",".join(ids[start:start + LETTER_IDS_PER_METADATA_KEY])
+        for n, start in enumerate(range(0, len(ids), LETTER_IDS_PER_METADATA_KEY))
+    }
+
+def letter_ids_from_metadata(metadata: dict) -> List[str]:
+    """
+    Every letter id a checkout session pays for: letter_request_id for single-letter sessions,
+    letter_request_ids_<n> for carts.
+    """
+    letter_ids = []
+    if metadata.get("letter_request_id"):
+        letter_ids.append(metadata["letter_request_id"])
+    for key, value in metadata.items():
+        if key.startswith("letter_request_ids_") and value:
+            letter_ids.extend(value.split(","))
+    return letter_ids
 
 def create_checkout_session(letter_request_id: str, amount: int, success_url: str, cancel_url: str):
     """
@@ -11,7 +58,7 @@ def create_checkout_session(letter_request_id: str, amount: int, success_url: st
     amount is in cents (e.g., $5.00 = 500).
     success_url and cancel_url are where Stripe will redirect after payment.
     """
-    session = stripe.checkout.Session.create(
+    session = get_stripe().checkout.Session.create(
         payment_method_types=["card"],
         line_items=[{
             "price_data": {
@@ -31,3 +78,94 @@ def create_checkout_session(letter_request_id: str, amount: int, success_url: st
         }
     )
     return session
+
+def create_cart_checkout_session(letters: Sequence[Tuple[UUID, str]], amount: int, success_url: str, cancel_url: str):
+    """
+    Create one Stripe Checkout Session paying for several letters, with a line item per
+    (letter_request_id, politician name) pair. amount is the per-letter price in cents.
+    """
+    session = get_stripe().checkout.Session.create(
+        payment_method_types=["card"],
+        line_items=[{
+            "price_data": {
+                "currency": "usd",
+                "product_data": {
+                    "name": f"Letter Mailing Service: {politician_name}"
+                },
+                "unit_amount": amount
+            },
+            "quantity": 1
+        } for _, politician_name in letters],
+        mode="payment",
+        success_url=success_url,
+        cancel_url=cancel_url,
+        metadata=letter_ids_metadata([letter_id for letter_id, _ in letters])
+    )
+    return session
+
+def _reuse_until() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.STRIPE_CHECKOUT_REUSE_MARGIN_SECONDS)
+
+def has_live_checkout_session(letter_req: UserLetterRequest, reuse_until: datetime) -> bool:
+    return bool(
+        letter_req.checkout_session_url
+        and letter_req.checkout_session_expires_at
+        and letter_req.checkout_session_expires_at > reuse_until
+    )
+
+def store_checkout_session(letters: Sequence[UserLetterRequest], session):
+    for letter_req in letters:
+        letter_req.checkout_session_id = session.id
+        letter_req.checkout_session_url = session.url
+        letter_req.checkout_session_expires_at = datetime.fromtimestamp(session.expires_at, tz=timezone.utc)
+
+def get_or_create_checkout_url(db: Session, letter_req: UserLetterRequest, amount: int, success_url: str, cancel_url: str) -> str:
+    """
+    Return the checkout URL stored on the letter while its session is still open, otherwise create
+    a new session, store it and commit. The caller should hold a row lock on letter_req so
+    concurrent requests for the same letter share one session. A stored session may be a cart's.
+    """
+    if has_live_checkout_session(letter_req, _reuse_until()):
+        return letter_req.checkout_session_url
+
+    session = create_checkout_session(str(letter_req.id), amount, success_url, cancel_url)
+    store_checkout_session([letter_req], session)
+    db.commit()
+    return session.url
+
+def shared_checkout_url(db: Session, letters: Sequence[UserLetterRequest]) -> Optional[str]:
+    """
+    The URL of a live session paying for exactly these letters, e.g. when a cart is submitted twice.
+    """
+    session_ids = {letter_req.checkout_session_id for letter_req in letters}
+    if len(session_ids) != 1 or not has_live_checkout_session(letters[0], _reuse_until()):
+        return None
+    session_letters = db.execute(
+        select(func.count()).where(UserLetterRequest.checkout_session_id == letters[0].checkout_session_id)
+    ).scalar()
+    return letters[0].checkout_session_url if session_letters == len(letters) else None
+
+def cart_checkout_blocker(letters: Sequence[UserLetterRequest]) -> Optional[str]:
+    """
+    Why a new cart session can't be opened for these letters, or None if it can. A letter with a
+    live session of its own or of another cart would otherwise be payable twice.
+    """
+    reuse_until = _reuse_until()
+    for letter_req in letters:
+        if has_live_checkout_session(letter_req, reuse_until):
+            return f"Letter {letter_req.id} already has an open checkout session."
+    return None
+
+def create_cart_checkout_url(db: Session, letters: Sequence[Tuple[UserLetterRequest, str]], amount: int,
+                             success_url: str, cancel_url: str) -> str:
+    """
+    Create a cart session for the (letter, politician name) pairs, store it on every letter and
+    commit, so /pay on any of them reuses it. The caller should hold row locks on the letters.
+    """
+    session = create_cart_checkout_session(
+        [(letter_req.id, politician_name) for letter_req, politician_name in letters],
+        amount, success_url, cancel_url
+    )
+    store_checkout_session([letter_req for letter_req, _ in letters], session)
+    db.commit()
+    return session.url
@@ -0,0 +1,115 @@
+# app/services/principal_cache.py
+
+import json
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.kv_store import get_kv_store, run_store_call
+from app.models.user import User
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user's auth fields only; load the User row when anything else is needed.
+    """
+    id: uuid.UUID
+    role: str
+    is_active: bool
+    is_verified: bool
+    token_version: int
+
+def _principal_key(user_id) -> str:
+    return f"principal:{user_id}"
+
+def _generation_key(user_id) -> str:
+    return f"principal_generation:{user_id}"
+
+def _cache_enabled(store) -> bool:
+    # A process-local cache can't be invalidated from the other workers, so it would keep
+    # honouring logged-out, demoted or deactivated users there until the entry expired.
+    return store.shared or settings.WEB_CONCURRENCY <= 1
+
+def _cached_principal(store, user_id) -> Tuple[Optional[Principal], str]:
+    """
+    The cached principal, if it was cached at the user's current generation, and that generation.
+    The generation is read before any database fallback so the refill is tagged with it.
+    """
+    generation = store.get(_generation_key(user_id)) or ""
+    cached = store.get(_principal_key(user_id))
+    if cached is None:
+        return None, generation
+    data = json.loads(cached)
+    if data.pop("generation", None) != generation:
+        return None, generation
+    return Principal(**{**data, "id": uuid.UUID(data["id"])}), generation
+
+def _principal_query(user_id):
+    return select(User.id, User.role, User.is_active, User.is_verified, User.token_version).where(User.id == user_id)
+
+def _principal_from_row(row) -> Principal:
+    return Principal(
+        id=row.id,
+        role=row.role,
+        is_active=bool(row.is_active),
+        is_verified=bool(row.is_verified),
+        token_version=row.token_version or 0
+    )
+
+def _cache_principal(store, user_id, principal: Principal, generation: str):
+    # An entry tagged with an older generation is ignored, so a request that read the row before
+    # an invalidation can't bring the stale principal back by caching it afterwards.
+    value = json.dumps({**asdict(principal), "id": str(principal.id), "generation": generation})
+    store.set(_principal_key(user_id), value, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+def get_principal(db: Session, user_id) -> Optional[Principal]:
+    """
+    Resolve a principal from the cache, falling back to a narrow query on the users table.
+    """
+    store = get_kv_store()
+    if not _cache_enabled(store):
+        row = db.execute(_principal_query(user_id)).first()
+        return _principal_from_row(row) if row else None
+
+    principal, generation = _cached_principal(store, user_id)
+    if principal is not None:
+        return principal
+
+    row = db.execute(_principal_query(user_id)).first()
+    if not row:
+        return None
+    principal = _principal_from_row(row)
+    _cache_principal(store, user_id, principal, generation)
+    return principal
+
+async def get_principal_async(db: AsyncSession, user_id) -> Optional[Principal]:
+    """
+    get_principal for async routes. Cache calls to a network store run in the threadpool.
+    """
+    store = get_kv_store()
+    if not _cache_enabled(store):
+        row = (await db.execute(_principal_query(user_id))).first()
+        return _principal_from_row(row) if row else None
+
+    principal, generation = await run_store_call(_cached_principal, store, user_id)
+    if principal is not None:
+        return principal
+
+    row = (await db.execute(_principal_query(user_id))).first()
+    if not row:
+        return None
+    principal = _principal_from_row(row)
+    await run_store_call(_cache_principal, store, user_id, principal, generation)
+    return principal
+
+def invalidate_principal(user_id):
+    """
+    Call after committing a change to a user's role, activation, verification, password or token_version.
+    Starts a new generation, which outlives every entry cached under the old one, then drops the entry.
+    """
+    store = get_kv_store()
+    store.set(_generation_key(user_id), uuid.uuid4().hex, settings.PRINCIPAL_CACHE_TTL_SECONDS * 2)
+    store.delete(_principal_key(user_id))
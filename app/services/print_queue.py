@@ -0,0 +1,136 @@
+# app/services/print_queue.py
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.politician import Politician
+from app.models.queued_letter import QueuedLetter, QueuedLetterStatus
+from app.models.user_letter_request import UserLetterRequest
+from app.services.render_context import PostalAddress
+
+OFFICE_ADDRESS_COLUMNS = (
+    Politician.office_address_line1,
+    Politician.office_address_line2,
+    Politician.office_city,
+    Politician.office_state,
+    Politician.office_zip
+)
+
+@dataclass(frozen=True)
+class ClaimedLetter:
+    id: UUID
+    user_letter_request_id: UUID
+    status: QueuedLetterStatus
+    priority: int
+    scheduled_for: datetime
+    created_at: datetime
+    bill_id: UUID
+    politician_id: UUID
+    politician_name: str
+
+@dataclass(frozen=True)
+class OfficeBatch:
+    """
+    Claimed letters that all go to one legislative office, to be printed and stuffed together.
+    """
+    office_address: PostalAddress
+    letters: List[ClaimedLetter]
+
+def _claimable_query(db: Session, now: datetime):
+    # Due, still queued, and not held by a live claim; stale claims are assumed abandoned
+    lease_expired_before = now - timedelta(seconds=settings.PRINT_QUEUE_CLAIM_LEASE_SECONDS)
+    return (
+        db.query(QueuedLetter)
+        .filter(
+            QueuedLetter.status == QueuedLetterStatus.queued,
+            QueuedLetter.scheduled_for <= now,
+            or_(QueuedLetter.claimed_at.is_(None), QueuedLetter.claimed_at < lease_expired_before)
+        )
+    )
+
+def _office_address_equals(address: tuple):
+    line1, line2, city, state, zip_code = address
+    return and_(
+        Politician.office_address_line1 == line1,
+        Politician.office_address_line2.is_(None) if line2 is None else Politician.office_address_line2 == line2,
+        Politician.office_city == city,
+        Politician.office_state == state,
+        Politician.office_zip == zip_code
+    )
+
+def _claim_next_office(db: Session, now: datetime, limit: int) -> Optional[OfficeBatch]:
+    # The highest priority due letter picks the office; it walks ix_queued_letters_claimable
+    head = (
+        _claimable_query(db, now)
+        .join(UserLetterRequest, QueuedLetter.user_letter_request_id == UserLetterRequest.id)
+        .join(Politician, UserLetterRequest.politician_id == Politician.id)
+        .with_entities(*OFFICE_ADDRESS_COLUMNS)
+        .order_by(QueuedLetter.priority.desc(), QueuedLetter.scheduled_for, QueuedLetter.id)
+        .limit(1)
+        .with_for_update(skip_locked=True, of=QueuedLetter)
+        .first()
+    )
+    if head is None:
+        return None
+
+    # Then take up to limit due letters for every politician at that address,
+    # starting from the (small) politicians table rather than the whole queue
+    politician_ids = db.query(Politician.id).filter(_office_address_equals(tuple(head)))
+    rows = (
+        _claimable_query(db, now)
+        .join(UserLetterRequest, QueuedLetter.user_letter_request_id == UserLetterRequest.id)
+        .join(Politician, UserLetterRequest.politician_id == Politician.id)
+        .filter(UserLetterRequest.politician_id.in_(politician_ids.scalar_subquery()))
+        .with_entities(
+            QueuedLetter.id,
+            QueuedLetter.user_letter_request_id,
+            QueuedLetter.status,
+            QueuedLetter.priority,
+            QueuedLetter.scheduled_for,
+            QueuedLetter.created_at,
+            UserLetterRequest.bill_id,
+            UserLetterRequest.politician_id,
+            Politician.name
+        )
+        .order_by(QueuedLetter.priority.desc(), QueuedLetter.scheduled_for, QueuedLetter.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=QueuedLetter)
+        .all()
+    )
+    if not rows:
+        return None
+
+    line1, line2, city, state, zip_code = head
+    return OfficeBatch(
+        office_address=PostalAddress(line1=line1, line2=line2 or "", city=city, state=state, zip=zip_code),
+        letters=[ClaimedLetter(*row) for row in rows]
+    )
+
+def claim_print_batch(db: Session, batch_size: int) -> List[OfficeBatch]:
+    """
+    Claim up to batch_size due queued letters, highest priority first, grouped by the office
+    address they are sent to. Whole offices are taken before moving on to the next one. Claimed
+    letters are skipped by other claims for PRINT_QUEUE_CLAIM_LEASE_SECONDS, or until they are
+    marked processed. Commits the claim.
+    """
+    now = datetime.now(timezone.utc)
+    batches = []
+    remaining = batch_size
+    while remaining > 0:
+        batch = _claim_next_office(db, now, remaining)
+        if batch is None:
+            break
+        batches.append(batch)
+        remaining -= len(batch.letters)
+
+        # Claim right away so the next office lookup doesn't find these letters again
+        db.query(QueuedLetter).filter(
+            QueuedLetter.id.in_([letter.id for letter in batch.letters])
+        ).update({QueuedLetter.claimed_at: now}, synchronize_session=False)
+
+    db.commit()
+    return batches
@@ -1,15 +1,19 @@
 # app/services/printing_service.py
 
 import os
-import pdfkit
-import cups
 from app.core.config import settings
 
+# pdfkit and cups are imported on first use; only the print endpoints need them
+
 def html_to_pdf(html_content: str) -> bytes:
+    import pdfkit
+
     pdf = pdfkit.from_string(html_content, False)
     return pdf
 
 def print_pdf(pdf_bytes: bytes, printer_name: str) -> str:
+    import cups
+
     # Save PDF to a temp file
     tmp_pdf_path = "/tmp/queued_letter.pdf"
     with open(tmp_pdf_path, "wb") as f:
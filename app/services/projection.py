@@ -0,0 +1,39 @@
+# app/services/projection.py
+
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    Split a comma-separated fields parameter, keeping request order and dropping duplicates.
+    Returns None when no projection was requested; raises ValueError for unknown names.
+    """
+    if not fields:
+        return None
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    allowed = set(allowed)
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested or None
+
+def select_fields(query, columns: Dict[str, Any], fields: Iterable[str]) -> List[dict]:
+    """
+    Re-run query selecting only the columns mapped to the requested field names, so unrequested
+    (and possibly large) columns never leave the database. Names missing from columns are skipped.
+    """
+    selected = [f for f in fields if f in columns]
+    if not selected:
+        return []
+    rows = query.with_entities(*[columns[f].label(f) for f in selected]).all()
+    return [dict(zip(selected, row)) for row in rows]
+
+async def select_fields_async(db: AsyncSession, stmt, columns: Dict[str, Any], fields: Iterable[str]) -> List[dict]:
+    """
+    select_fields for a select() statement on an AsyncSession.
+    """
+    selected = [f for f in fields if f in columns]
+    if not selected:
+        return []
+    rows = (await db.execute(stmt.with_only_columns(*[columns[f].label(f) for f in selected]))).all()
+    return [dict(zip(selected, row)) for row in rows]
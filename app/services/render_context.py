@@ -0,0 +1,147 @@
+# app/services/render_context.py
+
+import json
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import true
+from sqlalchemy.orm import Session
+from app.models.user_letter_request import UserLetterRequest, LetterStatus
+from app.models.politician import Politician
+from app.models.global_return_address import GlobalReturnAddress
+from app.models.queued_letter import QueuedLetter
+from app.services.mailing_service import format_letter_text
+
+@dataclass(frozen=True)
+class PostalAddress:
+    line1: str
+    line2: str
+    city: str
+    state: str
+    zip: str
+
+    def as_dict(self) -> dict:
+        return {
+            "line1": self.line1,
+            "line2": self.line2,
+            "city": self.city,
+            "state": self.state,
+            "zip": self.zip
+        }
+
+@dataclass(frozen=True)
+class LetterRenderContext:
+    """
+    Everything needed to render, mail or print a single letter, loaded in one query.
+    The sender fields are None when no global return address has been set.
+    """
+    letter_request_id: UUID
+    user_id: Optional[UUID]
+    status: LetterStatus
+    final_letter_text: Optional[str]
+    recipient_name: str
+    recipient_address: PostalAddress
+    sender_name: Optional[str]
+    sender_address: Optional[PostalAddress]
+
+    @property
+    def has_return_address(self) -> bool:
+        return self.sender_address is not None
+
+    def letter_text(self) -> str:
+        """
+        Extract the 'letter' field from final_letter_text.
+        Raises ValueError if the stored JSON is missing or malformed.
+        """
+        if not self.final_letter_text:
+            raise ValueError("No final letter text available.")
+        try:
+            letter_data = json.loads(self.final_letter_text)
+        except (json.JSONDecodeError, TypeError):
+            raise ValueError("Invalid JSON in final_letter_text.")
+        letter_text = letter_data.get("letter") if isinstance(letter_data, dict) else None
+        if not letter_text or not isinstance(letter_text, str):
+            raise ValueError("No 'letter' field found in final_letter_text.")
+        return letter_text
+
+    def render_html(self) -> str:
+        return format_letter_text(
+            self.letter_text(),
+            recipient_name=self.recipient_name,
+            recipient_address=self.recipient_address.as_dict(),
+            sender_name=self.sender_name,
+            sender_address=self.sender_address.as_dict()
+        )
+
+def _render_context_query(db: Session):
+    # The global return address is a single-row table, so it is joined on TRUE
+    # rather than fetched with a separate query.
+    return (
+        db.query(
+            UserLetterRequest.id,
+            UserLetterRequest.user_id,
+            UserLetterRequest.status,
+            UserLetterRequest.final_letter_text,
+            Politician.name,
+            Politician.office_address_line1,
+            Politician.office_address_line2,
+            Politician.office_city,
+            Politician.office_state,
+            Politician.office_zip,
+            GlobalReturnAddress.organization_name,
+            GlobalReturnAddress.address_line1,
+            GlobalReturnAddress.address_line2,
+            GlobalReturnAddress.city,
+            GlobalReturnAddress.state,
+            GlobalReturnAddress.zipcode
+        )
+        .join(Politician, UserLetterRequest.politician_id == Politician.id)
+        .outerjoin(GlobalReturnAddress, true())
+    )
+
+def _context_from_row(row) -> LetterRenderContext:
+    (
+        letter_request_id, user_id, status, final_letter_text,
+        politician_name, office_line1, office_line2, office_city, office_state, office_zip,
+        organization_name, return_line1, return_line2, return_city, return_state, return_zip
+    ) = row
+
+    sender_address = None
+    if return_line1 is not None:
+        sender_address = PostalAddress(
+            line1=return_line1,
+            line2=return_line2 or "",
+            city=return_city,
+            state=return_state,
+            zip=return_zip
+        )
+
+    return LetterRenderContext(
+        letter_request_id=letter_request_id,
+        user_id=user_id,
+        status=status,
+        final_letter_text=final_letter_text,
+        recipient_name=politician_name,
+        recipient_address=PostalAddress(
+            line1=office_line1,
+            line2=office_line2 or "",
+            city=office_city,
+            state=office_state,
+            zip=office_zip
+        ),
+        sender_name=organization_name,
+        sender_address=sender_address
+    )
+
+def load_render_context(db: Session, letter_request_id: UUID) -> Optional[LetterRenderContext]:
+    row = _render_context_query(db).filter(UserLetterRequest.id == letter_request_id).first()
+    return _context_from_row(row) if row else None
+
+def load_render_context_for_queued_letter(db: Session, queued_letter_id: UUID) -> Optional[LetterRenderContext]:
+    row = (
+        _render_context_query(db)
+        .join(QueuedLetter, QueuedLetter.user_letter_request_id == UserLetterRequest.id)
+        .filter(QueuedLetter.id == queued_letter_id)
+        .first()
+    )
+    return _context_from_row(row) if row else None
@@ -1,9 +1,38 @@
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
+from app.core.bounded_executor import BoundedExecutor
+from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
-def hash_password(password: str) -> str:
+# bcrypt is CPU-bound, so it runs in a dedicated process pool instead of on the request threads.
+# Calls raise ExecutorBusy (429) once PASSWORD_HASH_MAX_PENDING jobs are in flight.
+_hasher = BoundedExecutor(
+    "password_hash",
+    lambda: ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS),
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    inline=settings.PASSWORD_HASH_WORKERS <= 0
+)
+
+# Executed in the pool's worker processes
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+def _verify_and_update(plain_password: str, hashed_password: str):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def hash_password(password: str) -> str:
+    return _hasher.run(_hash, password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _hasher.run(_verify, plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """
+    Returns (valid, new_hash). new_hash is set when the stored hash uses an outdated
+    work factor and should be replaced with it.
+    """
+    return _hasher.run(_verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,121 @@
+# app/services/stripe_events.py
+
+import logging
+from datetime import datetime, timezone
+from uuid import UUID
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.stripe_event import StripeEvent
+from app.models.user_letter_request import UserLetterRequest, LetterStatus
+from app.services.payment_service import letter_ids_from_metadata
+
+logger = logging.getLogger(__name__)
+
+CHECKOUT_SESSION_COMPLETED = "checkout.session.completed"
+CHECKOUT_SESSION_EXPIRED = "checkout.session.expired"
+
+# Statuses a letter may be paid from; a late or replayed event never moves a mailed letter back
+PAYABLE_STATUSES = (LetterStatus.drafting, LetterStatus.finalized)
+
+def parse_stripe_event(event: dict) -> dict:
+    """
+    Extract the columns stored for a Stripe event. Raises ValueError for malformed events.
+    """
+    try:
+        event_id = event["id"]
+        event_type = event["type"]
+    except (KeyError, TypeError):
+        raise ValueError("Malformed Stripe event")
+
+    occurred_at = datetime.now(timezone.utc)
+    if event.get("created"):
+        try:
+            occurred_at = datetime.fromtimestamp(int(event["created"]), tz=timezone.utc)
+        except (TypeError, ValueError):
+            raise ValueError("Malformed Stripe event created")
+
+    return {
+        "id": event_id,
+        "event_type": event_type,
+        "occurred_at": occurred_at,
+        "payload": event
+    }
+
+def record_stripe_event(db: Session, event: dict):
+    """
+    Insert a parsed event; Stripe retries of the same event id are ignored.
+    """
+    db.execute(insert(StripeEvent).values(**event).on_conflict_do_nothing(index_elements=[StripeEvent.id]))
+    db.commit()
+
+def event_session_id(payload: dict):
+    return ((payload.get("data") or {}).get("object") or {}).get("id")
+
+def paid_letter_ids(payload: dict) -> list:
+    """
+    Letter ids a checkout.session.completed event pays for, read from the session metadata.
+    """
+    session = (payload.get("data") or {}).get("object") or {}
+    letter_ids = []
+    for letter_request_id in letter_ids_from_metadata(session.get("metadata") or {}):
+        try:
+            letter_ids.append(UUID(letter_request_id))
+        except ValueError:
+            logger.warning("Ignoring invalid letter_request_id %r in Stripe event %s", letter_request_id, payload.get("id"))
+    return letter_ids
+
+def apply_pending_stripe_events(db: Session, batch_size: int) -> int:
+    """
+    Apply up to batch_size unapplied events with one UPDATE for all letters they pay for, including
+    every letter of a cart checkout, then mark them applied. The URLs of completed and expired
+    sessions are cleared from the letters storing them so /pay never hands them out again; the
+    session id stays as a record of the checkout. Event types without a handler are marked
+    applied as-is.
+    Returns the number of events consumed.
+    """
+    events = (
+        db.query(StripeEvent.id, StripeEvent.event_type, StripeEvent.payload)
+        .filter(StripeEvent.applied_at.is_(None))
+        .order_by(StripeEvent.received_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not events:
+        db.rollback()
+        return 0
+
+    letter_ids = set()
+    closed_session_ids = set()
+    for _, event_type, payload in events:
+        if event_type == CHECKOUT_SESSION_COMPLETED:
+            letter_ids.update(paid_letter_ids(payload))
+        if event_type in (CHECKOUT_SESSION_COMPLETED, CHECKOUT_SESSION_EXPIRED) and event_session_id(payload):
+            closed_session_ids.add(event_session_id(payload))
+
+    if letter_ids:
+        db.execute(
+            update(UserLetterRequest)
+            .where(UserLetterRequest.id.in_(letter_ids))
+            .where(UserLetterRequest.status.in_(PAYABLE_STATUSES))
+            .values(status=LetterStatus.paid, paid_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    if closed_session_ids:
+        db.execute(
+            update(UserLetterRequest)
+            .where(UserLetterRequest.checkout_session_id.in_(closed_session_ids))
+            .values(checkout_session_url=None, checkout_session_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    db.execute(
+        update(StripeEvent)
+        .where(StripeEvent.id.in_([e[0] for e in events]))
+        .values(applied_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(events)
@@ -0,0 +1,38 @@
+# app/services/user_photos.py
+
+import hashlib
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.models.user_photo import UserPhoto
+
+PHOTO = "photo"
+THUMBNAIL = "thumbnail"
+
+def save_user_photos(db: Session, user: User, photo: bytes, thumbnail: bytes, content_type: str):
+    """
+    Replace the user's photo and thumbnail. The caller commits.
+    """
+    for kind, data in ((PHOTO, photo), (THUMBNAIL, thumbnail)):
+        db.merge(UserPhoto(
+            user_id=user.id,
+            kind=kind,
+            content_type=content_type,
+            etag=hashlib.sha256(data).hexdigest(),
+            data=data
+        ))
+    user.photo_etag = hashlib.sha256(photo).hexdigest()
+
+def delete_user_photos(db: Session, user: User):
+    """
+    Remove the user's photos. The caller commits.
+    """
+    db.query(UserPhoto).filter(UserPhoto.user_id == user.id).delete(synchronize_session=False)
+    user.photo_etag = None
+
+def get_photo_etag(db: Session, user_id, kind: str) -> Optional[str]:
+    # Conditional requests are answered without reading the image data
+    return db.query(UserPhoto.etag).filter(UserPhoto.user_id == user_id, UserPhoto.kind == kind).scalar()
+
+def get_photo(db: Session, user_id, kind: str) -> Optional[UserPhoto]:
+    return db.query(UserPhoto).filter(UserPhoto.user_id == user_id, UserPhoto.kind == kind).first()
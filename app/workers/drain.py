@@ -0,0 +1,25 @@
+# app/workers/drain.py
+#
+# Poll loop shared by the workers that drain a table in batches.
+
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+def run_drain_loop(apply_fn: Callable[[], int], batch_size: int, poll_seconds: float,
+                   stop_event: threading.Event, name: str):
+    """
+    Call apply_fn until stop_event is set. apply_fn handles one batch and returns how many rows it
+    consumed; the loop only sleeps poll_seconds once a batch comes back short of batch_size.
+    """
+    while not stop_event.is_set():
+        try:
+            consumed = apply_fn()
+        except Exception:
+            logger.exception("Unexpected error in %s", name)
+            consumed = 0
+        # Keep draining while full batches come back
+        if consumed < batch_size:
+            stop_event.wait(poll_seconds)
@@ -0,0 +1,38 @@
+# app/workers/email_sender.py
+#
+# Background sender that delivers queued emails from the email outbox.
+# Run with: python -m app.workers.email_sender
+
+import logging
+import threading
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.email_service import get_transport, send_pending_emails
+from app.workers.drain import run_drain_loop
+
+logger = logging.getLogger(__name__)
+
+def send_once(transport) -> int:
+    db = SessionLocal()
+    try:
+        return send_pending_emails(db, transport, settings.EMAIL_BATCH_SIZE)
+    finally:
+        db.close()
+
+def run(stop_event: threading.Event):
+    transport = get_transport()
+    run_drain_loop(
+        lambda: send_once(transport), settings.EMAIL_BATCH_SIZE, settings.EMAIL_SENDER_POLL_SECONDS,
+        stop_event, "email sender"
+    )
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    try:
+        run(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+if __name__ == "__main__":
+    main()
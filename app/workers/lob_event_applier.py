@@ -0,0 +1,40 @@
+# app/workers/lob_event_applier.py
+#
+# Background applier that folds Lob tracking events into mailing transactions.
+# Run with: python -m app.workers.lob_event_applier
+
+import logging
+import threading
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.lob_events import apply_pending_lob_events
+from app.workers.drain import run_drain_loop
+
+logger = logging.getLogger(__name__)
+
+def apply_once() -> int:
+    db = SessionLocal()
+    try:
+        applied = apply_pending_lob_events(db, settings.LOB_EVENT_BATCH_SIZE)
+    finally:
+        db.close()
+    if applied:
+        logger.info("Processed %d Lob events", applied)
+    return applied
+
+def run(stop_event: threading.Event):
+    run_drain_loop(
+        apply_once, settings.LOB_EVENT_BATCH_SIZE, settings.LOB_EVENT_POLL_SECONDS,
+        stop_event, "Lob event applier"
+    )
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    try:
+        run(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+if __name__ == "__main__":
+    main()
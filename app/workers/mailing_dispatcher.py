@@ -0,0 +1,128 @@
+# app/workers/mailing_dispatcher.py
+#
+# Background dispatcher that mails paid letters via Lob.
+# Run with: python -m app.workers.mailing_dispatcher
+
+import logging
+import threading
+import requests
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.throttling import TokenBucket
+from app.models.mailing_transaction import MailingTransaction, MailingStatus
+from app.models.user_letter_request import UserLetterRequest, LetterStatus
+from app.services.mailing_service import (
+    mail_letter, unresolved_attempt_exists, attempt_in_flight_exists, queued_for_print_exists
+)
+from app.services.render_context import load_render_context
+
+logger = logging.getLogger(__name__)
+
+def next_paid_letter_query(db: Session):
+    """
+    Query locking the oldest paid letter that is waiting to be mailed, skipping rows other workers hold.
+    Letters queued for printing, with an unretried failed or unconfirmed mailing attempt, or with a
+    mailing attempt in flight are left alone (see mailing_service.dispatch_blocker).
+    """
+    return (
+        db.query(UserLetterRequest.id)
+        .filter(
+            UserLetterRequest.status == LetterStatus.paid,
+            UserLetterRequest.final_letter_text.isnot(None),
+            ~unresolved_attempt_exists(UserLetterRequest.id),
+            ~attempt_in_flight_exists(UserLetterRequest.id),
+            ~queued_for_print_exists(UserLetterRequest.id)
+        )
+        .order_by(UserLetterRequest.paid_at)
+        .limit(1)
+        .with_for_update(skip_locked=True, of=UserLetterRequest)
+    )
+
+def claim_next_paid_letter(db: Session):
+    """
+    Lock and return the id of the next letter to mail, or None. The row lock is held until the
+    session commits or rolls back.
+    """
+    return next_paid_letter_query(db).scalar()
+
+def dispatch_one(rate_limiter: TokenBucket) -> bool:
+    """
+    Claim and mail a single paid letter. Returns False when there was nothing to mail.
+    """
+    db = SessionLocal()
+    try:
+        letter_id = claim_next_paid_letter(db)
+        if letter_id is None:
+            db.rollback()
+            return False
+
+        ctx = load_render_context(db, letter_id)
+        if not ctx.has_return_address:
+            logger.error("No global return address set; pausing mailing dispatch.")
+            db.rollback()
+            return False
+
+        try:
+            mailing_tx, _ = mail_letter(
+                ctx, db,
+                max_attempts=settings.MAILING_MAX_ATTEMPTS,
+                rate_limiter=rate_limiter
+            )
+            logger.info("Mailed letter %s (mailing transaction %s)", letter_id, mailing_tx.id)
+        except requests.RequestException as e:
+            # mail_letter already recorded the outcome on the attempt. This comes first because
+            # requests.JSONDecodeError, an unparseable reply from Lob, is also a ValueError.
+            logger.warning("Mailing letter %s failed: %s", letter_id, e)
+        except ValueError as e:
+            # Raised before Lob is called: the letter can never be rendered. Record it so it is not claimed again.
+            db.add(MailingTransaction(
+                user_letter_request_id=letter_id,
+                status=MailingStatus.failed,
+                error_message=str(e)
+            ))
+            db.commit()
+            logger.warning("Letter %s cannot be mailed: %s", letter_id, e)
+        return True
+    finally:
+        db.close()
+
+def _worker(rate_limiter: TokenBucket, stop_event: threading.Event):
+    while not stop_event.is_set():
+        try:
+            busy = dispatch_one(rate_limiter)
+        except Exception:
+            logger.exception("Unexpected error in mailing dispatcher")
+            busy = False
+        if not busy:
+            stop_event.wait(settings.MAILING_DISPATCHER_POLL_SECONDS)
+
+def start(stop_event: threading.Event) -> list:
+    """
+    Start MAILING_DISPATCHER_CONCURRENCY worker threads sharing one Lob rate limit.
+    Workers exit once stop_event is set.
+    """
+    rate_limiter = TokenBucket(settings.LOB_RATE_LIMIT_PER_SECOND)
+    threads = []
+    for i in range(settings.MAILING_DISPATCHER_CONCURRENCY):
+        thread = threading.Thread(
+            target=_worker, args=(rate_limiter, stop_event), name=f"mailing-dispatcher-{i}", daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    threads = start(stop_event)
+    try:
+        while not stop_event.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        stop_event.set()
+    for thread in threads:
+        thread.join()
+
+if __name__ == "__main__":
+    main()
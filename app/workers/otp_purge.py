@@ -0,0 +1,44 @@
+# app/workers/otp_purge.py
+#
+# Scheduled job that deletes expired OTP codes in bounded batches.
+# Run with: python -m app.workers.otp_purge (add --once to purge a single time, e.g. from cron)
+
+import logging
+import sys
+import threading
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.otp_service import purge_expired_otp_codes
+
+logger = logging.getLogger(__name__)
+
+def purge_once() -> int:
+    db = SessionLocal()
+    try:
+        deleted = purge_expired_otp_codes(db, settings.OTP_PURGE_BATCH_SIZE)
+        logger.info("Purged %d expired OTP codes", deleted)
+        return deleted
+    finally:
+        db.close()
+
+def run(stop_event: threading.Event):
+    while not stop_event.is_set():
+        try:
+            purge_once()
+        except Exception:
+            logger.exception("Unexpected error purging OTP codes")
+        stop_event.wait(settings.OTP_PURGE_INTERVAL_SECONDS)
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    if "--once" in sys.argv[1:]:
+        purge_once()
+        return
+    stop_event = threading.Event()
+    try:
+        run(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+if __name__ == "__main__":
+    main()
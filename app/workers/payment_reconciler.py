@@ -0,0 +1,64 @@
+# app/workers/payment_reconciler.py
+#
+# Nightly job that reconciles letter payment statuses with Stripe checkout sessions and
+# reports every discrepancy it finds.
+# Run with: python -m app.workers.payment_reconciler [--once] [--report PATH]
+
+import argparse
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.payment_reconciliation import ReconciliationReport, reconcile_payments
+
+logger = logging.getLogger(__name__)
+
+def reconcile_once(report_path: str = None) -> ReconciliationReport:
+    since = datetime.now(timezone.utc) - timedelta(seconds=settings.PAYMENT_RECONCILE_LOOKBACK_SECONDS)
+    db = SessionLocal()
+    try:
+        report = reconcile_payments(db, since, settings.PAYMENT_RECONCILE_BATCH_SIZE)
+    finally:
+        db.close()
+
+    logger.info(
+        "Reconciled %d checkout sessions (%d paid): %d letters fixed, %d unknown letters, "
+        "%d duplicate payments, %d paid without a session, %d paid outside checkout",
+        report.sessions_scanned, report.paid_sessions, len(report.letters_fixed), len(report.unknown_letters),
+        len(report.duplicate_payments), len(report.paid_without_session), len(report.paid_outside_checkout)
+    )
+    if report.has_discrepancies:
+        logger.warning("Payment discrepancies: %s", json.dumps(report.as_dict()))
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report.as_dict(), f, indent=2)
+    return report
+
+def run(stop_event: threading.Event, report_path: str = None):
+    while not stop_event.is_set():
+        try:
+            reconcile_once(report_path)
+        except Exception:
+            logger.exception("Unexpected error reconciling payments")
+        stop_event.wait(settings.PAYMENT_RECONCILE_INTERVAL_SECONDS)
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Reconcile letter payments with Stripe.")
+    parser.add_argument("--once", action="store_true", help="reconcile a single time, e.g. from cron")
+    parser.add_argument("--report", help="write the discrepancy report as JSON to this path")
+    args = parser.parse_args()
+
+    if args.once:
+        reconcile_once(args.report)
+        return
+    stop_event = threading.Event()
+    try:
+        run(stop_event, args.report)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# app/workers/stripe_event_applier.py
+#
+# Background applier that turns recorded Stripe events into letter payment transitions.
+# Run with: python -m app.workers.stripe_event_applier
+
+import logging
+import threading
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.stripe_events import apply_pending_stripe_events
+from app.workers.drain import run_drain_loop
+
+logger = logging.getLogger(__name__)
+
+def apply_once() -> int:
+    db = SessionLocal()
+    try:
+        applied = apply_pending_stripe_events(db, settings.STRIPE_EVENT_BATCH_SIZE)
+    finally:
+        db.close()
+    if applied:
+        logger.info("Applied %d Stripe events", applied)
+    return applied
+
+def run(stop_event: threading.Event):
+    run_drain_loop(
+        apply_once, settings.STRIPE_EVENT_BATCH_SIZE, settings.STRIPE_EVENT_POLL_SECONDS,
+        stop_event, "Stripe event applier"
+    )
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    try:
+        run(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+if __name__ == "__main__":
+    main()